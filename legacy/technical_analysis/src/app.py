@@ -4,6 +4,11 @@ from pattern_detector import PatternDetector
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import json
+import os
+import logging
+
+# Pattern detector milestones go to the console; set LOG_LEVEL=DEBUG for request/response detail
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(), format='%(message)s')
 
 # Page config
 st.set_page_config(
@@ -19,6 +24,26 @@ def get_detector():
 
 detector = get_detector()
 
+# Reuse fetched prices and indicators for the same inputs for 5 minutes
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_with_indicators(symbol, interval, period):
+    df = detector.fetch_data(symbol, interval, period)
+    if df is None:
+        return None
+    return detector.add_technical_indicators(df)
+
+# Sections of the AI analysis that hold JSON payloads
+ANALYSIS_SECTIONS = ('patterns', 'market_regime', 'price_prediction', 'support_resistance')
+
+# AI analysis is cached for a shorter time so it stays fresh
+@st.cache_data(ttl=60, show_spinner=False)
+def analyze_patterns(symbol, interval, period):
+    """Return the raw analysis (for the chart) and its sections decoded once"""
+    df = fetch_with_indicators(symbol, interval, period)
+    analysis = detector.detect_patterns(df)
+    parsed = {key: json.loads(analysis[key]) if analysis[key] else None for key in ANALYSIS_SECTIONS}
+    return analysis, parsed
+
 # App title and description
 st.title("📊 Technical Analysis with DeepSeek AI")
 st.markdown("""
@@ -56,15 +81,12 @@ period = st.sidebar.selectbox(
 if st.sidebar.button("Analyze"):
     with st.spinner("Fetching and analyzing data..."):
         try:
-            # Fetch data
-            df = detector.fetch_data(symbol, interval, period)
+            # Fetch data with technical indicators
+            df = fetch_with_indicators(symbol, interval, period)
             
             if df is not None:
-                # Add technical indicators
-                df = detector.add_technical_indicators(df)
-                
                 # Get AI analysis
-                analysis = detector.detect_patterns(df)
+                analysis, parsed = analyze_patterns(symbol, interval, period)
                 
                 # Create two columns
                 col1, col2 = st.columns([2, 1])
@@ -79,8 +101,8 @@ if st.sidebar.button("Analyze"):
                     
                     # Pattern Analysis
                     with st.expander("🎯 Pattern Analysis", expanded=True):
-                        if analysis['patterns']:
-                            pattern_data = json.loads(analysis['patterns'])
+                        pattern_data = parsed['patterns']
+                        if pattern_data:
                             st.write("**Detected Patterns:**")
                             for pattern in pattern_data.get('patterns', []):
                                 st.write(f"- {pattern}")
@@ -89,8 +111,8 @@ if st.sidebar.button("Analyze"):
                     
                     # Market Regime
                     with st.expander("🌊 Market Regime", expanded=True):
-                        if analysis['market_regime']:
-                            regime_data = json.loads(analysis['market_regime'])
+                        regime_data = parsed['market_regime']
+                        if regime_data:
                             st.write(f"**Current Regime:** {regime_data.get('regime', 'Unknown')}")
                             st.write(f"**Confidence:** {regime_data.get('confidence', 'N/A')}%")
                             st.write("**Characteristics:**")
@@ -99,8 +121,8 @@ if st.sidebar.button("Analyze"):
                     
                     # Price Prediction
                     with st.expander("🎯 Price Prediction", expanded=True):
-                        if analysis['price_prediction']:
-                            pred_data = json.loads(analysis['price_prediction'])
+                        pred_data = parsed['price_prediction']
+                        if pred_data:
                             st.write(f"**Target (24h):** {pred_data.get('price_target', 'N/A')}")
                             st.write(f"**Confidence:** {pred_data.get('confidence', 'N/A')}%")
                             st.write("**Key Factors:**")
@@ -112,8 +134,8 @@ if st.sidebar.button("Analyze"):
                     
                     # Support/Resistance
                     with st.expander("📊 Support & Resistance", expanded=True):
-                        if analysis['support_resistance']:
-                            sr_data = json.loads(analysis['support_resistance'])
+                        sr_data = parsed['support_resistance']
+                        if sr_data:
                             st.write("**Support Levels:**")
                             for level in sr_data.get('support_levels', []):
                                 st.write(f"- Price: {level['price']}, Strength: {level['strength']}/10")
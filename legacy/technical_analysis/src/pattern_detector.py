@@ -1,6 +1,10 @@
 import os
+import io
 import json
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -10,17 +14,26 @@ from dotenv import load_dotenv
 import plotly.graph_objects as go
 from sklearn.preprocessing import MinMaxScaler
 
+# Milestones log at INFO; request/response chatter at DEBUG
+logger = logging.getLogger(__name__)
+
+# Chat completions endpoint for every analysis request
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+# (connect, read) seconds for the API calls; the read allows for the reasoning model's slow answers
+REQUEST_TIMEOUT = (3.05, 120)
+
 class PatternDetector:
     def __init__(self):
-        print("\n=== Initializing Pattern Detector ===")
+        logger.info("=== Initializing Pattern Detector ===")
         load_dotenv()
         self.api_key = os.getenv('OPENROUTER_API_KEY')
         
         if not self.api_key:
-            print("❌ Error: OpenRouter API key not found!")
+            logger.error("❌ Error: OpenRouter API key not found!")
             raise ValueError("OpenRouter API key not found in environment variables")
         else:
-            print("✅ API Key loaded successfully")
+            logger.info("✅ API Key loaded successfully")
             
         self.headers = {
             'Authorization': f'Bearer {self.api_key}',
@@ -28,7 +41,20 @@ class PatternDetector:
             'HTTP-Referer': 'http://localhost:8501',
             'X-Title': 'Technical Analysis Pattern Detector'
         }
-        print("✅ Headers configured")
+        # One keep-alive session so the analysis calls reuse a single TLS connection
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # Retry rate limits and server errors with a short exponential backoff (POSTs included)
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=None,
+            # Hand back the last failed response so the status checks below still report it
+            raise_on_status=False
+        )
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry))
+        logger.info("✅ Headers configured")
         
         # Initialize technical indicators
         self.indicators = {
@@ -37,20 +63,20 @@ class PatternDetector:
             'BB': {'timeperiod': 20, 'nbdevup': 2, 'nbdevdn': 2},
             'ATR': {'timeperiod': 14}
         }
-        print("✅ Technical indicators initialized")
-        print("=== Initialization Complete ===\n")
+        logger.info("✅ Technical indicators initialized")
+        logger.info("=== Initialization Complete ===")
     
     def fetch_data(self, symbol, interval='1d', period='6mo'):
         """Fetch historical price data"""
-        print(f"\n=== Fetching Data for {symbol} ===")
-        print(f"Timeframe: {interval}, Period: {period}")
+        logger.info("=== Fetching Data for %s ===", symbol)
+        logger.debug("Timeframe: %s, Period: %s", interval, period)
         try:
             ticker = yf.Ticker(symbol)
             df = ticker.history(period=period, interval=interval)
-            print(f"✅ Data fetched successfully: {len(df)} periods")
+            logger.info("✅ Data fetched successfully: %s periods", len(df))
             return df
         except Exception as e:
-            print(f"❌ Error fetching data: {str(e)}")
+            logger.error("❌ Error fetching data: %s", e)
             return None
     
     def add_technical_indicators(self, df):
@@ -66,13 +92,13 @@ class PatternDetector:
             df['Open'] = df['Open'].fillna(df['Close'])
             df['Volume'] = df['Volume'].fillna(0)
             
-            print("Initial columns:", df.columns.tolist())
+            logger.debug("Initial columns: %s", df.columns.tolist())
             
             # Add RSI
             from ta.momentum import RSIIndicator
             rsi = RSIIndicator(close=df['Close'], window=self.indicators['RSI']['timeperiod'])
             df['RSI'] = rsi.rsi()
-            print("After RSI:", df.columns.tolist())
+            logger.debug("After RSI: %s", df.columns.tolist())
             
             # Add MACD
             from ta.trend import MACD
@@ -83,7 +109,7 @@ class PatternDetector:
             df['MACD_12_26_9'] = macd.macd()
             df['MACDs_12_26_9'] = macd.macd_signal()
             df['MACDh_12_26_9'] = macd.macd_diff()
-            print("After MACD:", df.columns.tolist())
+            logger.debug("After MACD: %s", df.columns.tolist())
             
             # Add Bollinger Bands
             from ta.volatility import BollingerBands
@@ -93,14 +119,14 @@ class PatternDetector:
             df['BBU_20_2.0'] = bb.bollinger_hband()
             df['BBM_20_2.0'] = bb.bollinger_mavg()
             df['BBL_20_2.0'] = bb.bollinger_lband()
-            print("After BB:", df.columns.tolist())
+            logger.debug("After BB: %s", df.columns.tolist())
             
             # Add ATR
             from ta.volatility import AverageTrueRange
             atr = AverageTrueRange(high=df['High'], low=df['Low'], close=df['Close'],
                                   window=self.indicators['ATR']['timeperiod'])
             df['ATR'] = atr.average_true_range()
-            print("After ATR:", df.columns.tolist())
+            logger.debug("After ATR: %s", df.columns.tolist())
             
             # Calculate Returns and Volatility
             df['Returns'] = df['Close'].pct_change()
@@ -109,34 +135,38 @@ class PatternDetector:
             # Fill any remaining NaN values
             df = df.ffill().bfill()
             
-            print("Final columns:", df.columns.tolist())
+            logger.debug("Final columns: %s", df.columns.tolist())
             return df
         except Exception as e:
-            print(f"Error adding indicators: {str(e)}")
-            print("DataFrame head:", df.head())
-            print("DataFrame info:", df.info())
+            logger.error("Error adding indicators: %s", e)
+            # df.info() builds its whole report up front, so only do it when debugging
+            if logger.isEnabledFor(logging.DEBUG):
+                buffer = io.StringIO()
+                df.info(buf=buffer)
+                logger.debug("DataFrame head:\n%s", df.head())
+                logger.debug("DataFrame info:\n%s", buffer.getvalue())
             return df
     
     def detect_patterns(self, df, lookback=30):
         """Detect patterns in the price action using DeepSeek AI"""
-        print("\n=== Starting Pattern Detection ===")
+        logger.info("=== Starting Pattern Detection ===")
         try:
             recent_data = df.tail(lookback).copy()
-            print(f"Analyzing last {lookback} periods")
+            logger.debug("Analyzing last %s periods", lookback)
             
-            print("\n1. Getting Pattern Analysis...")
+            logger.debug("1. Getting Pattern Analysis...")
             pattern_analysis = self._get_pattern_analysis(recent_data)
             
-            print("\n2. Getting Market Regime Analysis...")
+            logger.debug("2. Getting Market Regime Analysis...")
             regime_analysis = self._get_market_regime(recent_data)
             
-            print("\n3. Getting Price Prediction...")
+            logger.debug("3. Getting Price Prediction...")
             price_prediction = self._get_price_prediction(recent_data)
             
-            print("\n4. Getting Support/Resistance Levels...")
+            logger.debug("4. Getting Support/Resistance Levels...")
             support_resistance = self._get_support_resistance(recent_data)
             
-            print("\nPreparing response...")
+            logger.debug("Preparing response...")
             # Initialize default values for each analysis type
             default_pattern = json.dumps({
                 "patterns": [],
@@ -170,11 +200,11 @@ class PatternDetector:
                 'timestamp': datetime.now().isoformat()
             }
             
-            print("✅ Analysis complete")
+            logger.info("✅ Analysis complete")
             return combined_analysis
             
         except Exception as e:
-            print(f"❌ Error in pattern detection: {str(e)}")
+            logger.error("❌ Error in pattern detection: %s", e)
             return {
                 'patterns': json.dumps({"error": str(e), "patterns": [], "quality_score": "N/A", "completion": "N/A"}),
                 'market_regime': json.dumps({"error": str(e), "regime": "Unknown", "confidence": "N/A", "characteristics": []}),
@@ -185,12 +215,14 @@ class PatternDetector:
 
     def _get_pattern_analysis(self, df):
         """Get AI-powered pattern analysis"""
-        print("Making API call for pattern analysis...")
+        logger.debug("Making API call for pattern analysis...")
         
-        # Format the price data as a simple string to avoid formatting issues
-        price_data = df[['Open', 'High', 'Low', 'Close']].tail()
-        price_str = "\n".join([f"Date {idx}: O:{row['Open']:.2f} H:{row['High']:.2f} L:{row['Low']:.2f} C:{row['Close']:.2f}" 
-                             for idx, row in price_data.iterrows()])
+        # Format the price data as a simple string to avoid formatting issues.
+        # Plain arrays rather than iterrows(), which boxes every row into a Series
+        price_data = df.iloc[-5:]
+        prices = price_data[['Open', 'High', 'Low', 'Close']].to_numpy()
+        price_str = "\n".join(f"Date {idx}: O:{o:.2f} H:{h:.2f} L:{l:.2f} C:{c:.2f}"
+                              for idx, (o, h, l, c) in zip(price_data.index, prices))
         
         prompt = f"""Analyze the following price action and technical indicators to identify chart patterns:
 
@@ -214,27 +246,27 @@ Identify chart patterns and provide analysis. Return the response in this exact
 }}"""
 
         try:
-            print("Sending request to OpenRouter API...")
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=self.headers,
+            logger.debug("Sending request to OpenRouter API...")
+            response = self.session.post(
+                OPENROUTER_URL,
                 json={
                     "model": "deepseek/deepseek-r1:nitro",
                     "messages": [{"role": "user", "content": prompt}]
-                }
+                },
+                timeout=REQUEST_TIMEOUT
             )
             
-            print(f"API Response Status: {response.status_code}")
+            logger.debug("API Response Status: %s", response.status_code)
             if response.status_code == 200:
                 content = response.json()['choices'][0]['message']['content']
                 try:
                     # Validate JSON response
                     json_content = json.loads(content)
-                    print("✅ Pattern analysis received and validated")
-                    print(f"Received patterns: {json_content.get('patterns', [])}")
+                    logger.info("✅ Pattern analysis received and validated")
+                    logger.debug("Received patterns: %s", json_content.get('patterns', []))
                     return content
                 except json.JSONDecodeError as e:
-                    print(f"❌ Invalid JSON response from API: {e}")
+                    logger.error("❌ Invalid JSON response from API: %s", e)
                     return json.dumps({
                         "patterns": [],
                         "quality_score": "N/A",
@@ -244,15 +276,15 @@ Identify chart patterns and provide analysis. Return the response in this exact
                         "key_levels": []
                     })
             else:
-                print(f"❌ API request failed: {response.text}")
+                logger.error("❌ API request failed: %s", response.text)
             return None
         except Exception as e:
-            print(f"❌ Error in pattern analysis: {str(e)}")
+            logger.error("❌ Error in pattern analysis: %s", e)
             return None
 
     def _get_market_regime(self, df):
         """Detect current market regime using AI"""
-        print("Making API call for market regime analysis...")
+        logger.debug("Making API call for market regime analysis...")
         
         # Format price and volume trends as simple strings
         price_trend = df['Close'].pct_change().tail()
@@ -284,40 +316,40 @@ Return the response in this exact JSON format:
 }}"""
 
         try:
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=self.headers,
+            response = self.session.post(
+                OPENROUTER_URL,
                 json={
                     "model": "deepseek/deepseek-r1:nitro",
                     "messages": [{"role": "user", "content": prompt}]
-                }
+                },
+                timeout=REQUEST_TIMEOUT
             )
             
-            print(f"API Response Status: {response.status_code}")
+            logger.debug("API Response Status: %s", response.status_code)
             if response.status_code == 200:
                 content = response.json()['choices'][0]['message']['content']
                 try:
                     json_content = json.loads(content)
-                    print("✅ Market regime analysis received and validated")
-                    print(f"Detected regime: {json_content.get('regime', 'Unknown')} with {json_content.get('confidence', 'N/A')}% confidence")
+                    logger.info("✅ Market regime analysis received and validated")
+                    logger.debug("Detected regime: %s with %s%% confidence", json_content.get('regime', 'Unknown'), json_content.get('confidence', 'N/A'))
                     return content
                 except json.JSONDecodeError as e:
-                    print(f"❌ Invalid JSON response from API: {e}")
+                    logger.error("❌ Invalid JSON response from API: %s", e)
                     return json.dumps({
                         "regime": "Unknown",
                         "confidence": "N/A",
                         "characteristics": []
                     })
             else:
-                print(f"❌ API request failed: {response.text}")
+                logger.error("❌ API request failed: %s", response.text)
             return None
         except Exception as e:
-            print(f"❌ Error in market regime analysis: {str(e)}")
+            logger.error("❌ Error in market regime analysis: %s", e)
             return None
 
     def _get_price_prediction(self, df):
         """Get AI-powered price predictions"""
-        print("Making API call for price prediction...")
+        logger.debug("Making API call for price prediction...")
         
         # Calculate BB position safely
         try:
@@ -357,25 +389,25 @@ Return the response in this exact JSON format:
 }}"""
 
         try:
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=self.headers,
+            response = self.session.post(
+                OPENROUTER_URL,
                 json={
                     "model": "deepseek/deepseek-r1:nitro",
                     "messages": [{"role": "user", "content": prompt}]
-                }
+                },
+                timeout=REQUEST_TIMEOUT
             )
             
-            print(f"API Response Status: {response.status_code}")
+            logger.debug("API Response Status: %s", response.status_code)
             if response.status_code == 200:
                 content = response.json()['choices'][0]['message']['content']
                 try:
                     json_content = json.loads(content)
-                    print("✅ Price prediction received and validated")
-                    print(f"Price target: {json_content.get('price_target', 'N/A')} with {json_content.get('confidence', 'N/A')}% confidence")
+                    logger.info("✅ Price prediction received and validated")
+                    logger.debug("Price target: %s with %s%% confidence", json_content.get('price_target', 'N/A'), json_content.get('confidence', 'N/A'))
                     return content
                 except json.JSONDecodeError as e:
-                    print(f"❌ Invalid JSON response from API: {e}")
+                    logger.error("❌ Invalid JSON response from API: %s", e)
                     return json.dumps({
                         "price_target": str(df['Close'].iloc[-1]),
                         "confidence": "N/A",
@@ -384,15 +416,15 @@ Return the response in this exact JSON format:
                         "alternative_scenarios": []
                     })
             else:
-                print(f"❌ API request failed: {response.text}")
+                logger.error("❌ API request failed: %s", response.text)
             return None
         except Exception as e:
-            print(f"❌ Error in price prediction: {str(e)}")
+            logger.error("❌ Error in price prediction: %s", e)
             return None
 
     def _get_support_resistance(self, df):
         """Identify support and resistance levels using AI"""
-        print("Making API call for support/resistance analysis...")
+        logger.debug("Making API call for support/resistance analysis...")
         
         # Format price data as simple string
         price_stats = {
@@ -423,44 +455,44 @@ Return the response in this exact JSON format:
 }}"""
 
         try:
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=self.headers,
+            response = self.session.post(
+                OPENROUTER_URL,
                 json={
                     "model": "deepseek/deepseek-r1:nitro",
                     "messages": [{"role": "user", "content": prompt}]
-                }
+                },
+                timeout=REQUEST_TIMEOUT
             )
             
-            print(f"API Response Status: {response.status_code}")
+            logger.debug("API Response Status: %s", response.status_code)
             if response.status_code == 200:
                 content = response.json()['choices'][0]['message']['content']
                 try:
                     # Validate JSON response
                     json_content = json.loads(content)
-                    print("✅ Support/Resistance analysis received and validated")
-                    print(f"Found {len(json_content.get('support_levels', []))} support and {len(json_content.get('resistance_levels', []))} resistance levels")
+                    logger.info("✅ Support/Resistance analysis received and validated")
+                    logger.debug("Found %s support and %s resistance levels", len(json_content.get('support_levels', [])), len(json_content.get('resistance_levels', [])))
                     return content
                 except json.JSONDecodeError as e:
-                    print(f"❌ Invalid JSON response from API: {e}")
+                    logger.error("❌ Invalid JSON response from API: %s", e)
                     return json.dumps({
                         "support_levels": [],
                         "resistance_levels": []
                     })
             else:
-                print(f"❌ API request failed: {response.text}")
+                logger.error("❌ API request failed: %s", response.text)
             return None
         except Exception as e:
-            print(f"❌ Error in support/resistance analysis: {str(e)}")
+            logger.error("❌ Error in support/resistance analysis: %s", e)
             return None
     
     def plot_pattern(self, df, pattern_info):
         """Create an interactive plot with pattern annotations"""
-        print("\n=== Generating Plot ===")
+        logger.info("=== Generating Plot ===")
         try:
             fig = go.Figure()
             
-            print("Adding candlestick chart...")
+            logger.debug("Adding candlestick chart...")
             fig.add_trace(go.Candlestick(
                 x=df.index,
                 open=df['Open'],
@@ -470,7 +502,7 @@ Return the response in this exact JSON format:
                 name='Price'
             ))
             
-            print("Adding Bollinger Bands...")
+            logger.debug("Adding Bollinger Bands...")
             # Add upper band
             fig.add_trace(go.Scatter(
                 x=df.index,
@@ -496,11 +528,11 @@ Return the response in this exact JSON format:
                 fill='tonexty'
             ))
             
-            print("Adding support and resistance levels...")
+            logger.debug("Adding support and resistance levels...")
             if pattern_info and 'support_resistance' in pattern_info:
                 try:
                     sr_data = json.loads(pattern_info['support_resistance'])
-                    print("Support/Resistance data:", sr_data)
+                    logger.debug("Support/Resistance data: %s", sr_data)
                     
                     # Add support levels
                     support_levels = sr_data.get('support_levels', [])
@@ -516,7 +548,7 @@ Return the response in this exact JSON format:
                                         annotation_text=f"Support {price:.2f} (Strength: {strength})"
                                     )
                                 except (ValueError, TypeError) as e:
-                                    print(f"Error adding support level: {e}")
+                                    logger.error("Error adding support level: %s", e)
                     
                     # Add resistance levels
                     resistance_levels = sr_data.get('resistance_levels', [])
@@ -532,11 +564,11 @@ Return the response in this exact JSON format:
                                         annotation_text=f"Resistance {price:.2f} (Strength: {strength})"
                                     )
                                 except (ValueError, TypeError) as e:
-                                    print(f"Error adding resistance level: {e}")
+                                    logger.error("Error adding resistance level: %s", e)
                 except json.JSONDecodeError as e:
-                    print(f"Error parsing support/resistance data: {e}")
+                    logger.error("Error parsing support/resistance data: %s", e)
             
-            print("Updating layout...")
+            logger.debug("Updating layout...")
             fig.update_layout(
                 title='Price Action with Technical Patterns',
                 yaxis_title='Price',
@@ -563,11 +595,11 @@ Return the response in this exact JSON format:
                 )
             )
             
-            print("✅ Plot generated successfully")
+            logger.info("✅ Plot generated successfully")
             return fig
         except Exception as e:
-            print(f"❌ Error generating plot: {str(e)}")
-            print(f"Pattern info type: {type(pattern_info)}")
+            logger.error("❌ Error generating plot: %s", e)
+            logger.debug("Pattern info type: %s", type(pattern_info))
             if pattern_info:
-                print(f"Pattern info content: {pattern_info}")
+                logger.debug("Pattern info content: %s", pattern_info)
             return None 
\ No newline at end of file
@@ -10,19 +10,69 @@ from functools import wraps
 import requests
 import os
 from dotenv import load_dotenv
-import json
+import orjson
+import threading
+import re
+import sys
+import logging
+
+# Read the .env file once at import instead of on every button press
+load_dotenv()
+OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
+
+# Pattern detector milestones go to the console; set LOG_LEVEL=DEBUG for request/response detail
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(), format='%(message)s')
+
+# uvloop is a faster drop-in event loop; set it before any loop is created (not available on Windows)
+if sys.platform != 'win32':
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
+# Analysis summary parsing: blank-line separated sections tagged by a single match
+SECTION_SPLIT = re.compile(r'\n\n+').split
+SECTION_RE = re.compile(r'(?P<sum>Analysis Summary|Comprehensive Analysis)|(?P<num>[1-5])\.|(?P<con>(?i:conclusion))')
+
+# Characters that Streamlit markdown would otherwise interpret in raw tweet text ($ starts LaTeX)
+MARKDOWN_SPECIAL_RE = re.compile(r'([\\`*_{}\[\]()#+\-.!|>~$<])')
+
+def escape_markdown(text):
+    """Escape markdown syntax so text renders literally"""
+    return MARKDOWN_SPECIAL_RE.sub(r'\\\1', text)
+
+@st.cache_resource
+def get_loop():
+    """Create one event loop that lives across Streamlit reruns"""
+    # Sessions, queue workers and browser handles created inside the loop stay warm between clicks
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    return loop
+
+_loop_lock = threading.Lock()
+
+def run_async(coro):
+    """Run a coroutine on the shared event loop"""
+    # Streamlit sessions run on separate threads, so only one may drive the loop at a time
+    with _loop_lock:
+        return get_loop().run_until_complete(coro)
 
 def async_to_sync(f):
     """Convert async function to sync function"""
     @wraps(f)
     def wrapper(*args, **kwargs):
-        return asyncio.run(f(*args, **kwargs))
+        return run_async(f(*args, **kwargs))
     return wrapper
 
+@st.cache_resource
+def get_http_session():
+    """Create one keep-alive HTTP session shared across reruns"""
+    return requests.Session()
+
 def test_openrouter():
     """Test if OpenRouter API is working with deepseek-r1-distill-llama-70b"""
-    load_dotenv()
-    api_key = os.getenv('OPENROUTER_API_KEY')
+    api_key = OPENROUTER_API_KEY
     
     st.write("Testing OpenRouter API...")
     st.write("API Key:", api_key[:10] + "..." if api_key else "Not found")
@@ -46,16 +96,17 @@ def test_openrouter():
         
         st.write("Request body:", request_body)
         
-        response = requests.post(
+        response = get_http_session().post(
             "https://openrouter.ai/api/v1/chat/completions",
             headers=headers,
-            json=request_body
+            data=orjson.dumps(request_body),
+            timeout=30
         )
         
         st.write("Response status code:", response.status_code)
         
         if response.status_code == 200:
-            result = response.json()['choices'][0]['message']
+            result = orjson.loads(response.content)['choices'][0]['message']
             st.success("OpenRouter API is working!")
             st.write("Model Response:", result.get('content', 'No content'))
             
@@ -96,6 +147,18 @@ def get_analyzer():
         st.error(f"Failed to initialize the analyzer: {str(e)}")
         return None
 
+@st.cache_resource
+def get_inited_analyzer():
+    """Return the analyzer with its Twitter connection initialized once"""
+    analyzer = get_analyzer()
+    run_async(analyzer.init())
+    return analyzer
+
+@st.cache_resource
+def get_pattern_detector():
+    """Create one pattern detector so its HTTP session stays warm on the shared loop"""
+    return PatternDetector()
+
 analyzer = get_analyzer()
 
 if analyzer is None:
@@ -115,6 +178,10 @@ analysis_type = st.sidebar.selectbox(
     "Choose Analysis Type",
     ["Crypto Ticker Analysis", "Technical Analysis", "Single Text Analysis", "Multiple Sources Analysis"]
 )
+use_batch = st.sidebar.checkbox(
+    "Batch (cheap, up to 24h)",
+    help="Submit all texts as one Batch API job instead of one request per text"
+)
 
 # Add test button in sidebar
 st.sidebar.header("Debug Options")
@@ -150,17 +217,31 @@ if analysis_type == "Crypto Ticker Analysis":
     
     if st.button("Analyze Ticker"):
         status_placeholder = st.empty()
+        stats_placeholder = st.empty()
         result_placeholder = st.empty()
         
+        def show_stats(weighted_sentiment, stats):
+            """Display overall sentiment and stats"""
+            with stats_placeholder.container():
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("Weighted Sentiment", f"{weighted_sentiment:.2f}")
+                    st.metric("Tweet Count", stats['tweet_count'])
+                with col2:
+                    st.metric("Average Engagement", f"{stats['avg_engagement']:.1f}")
+                    sentiment_range = stats['sentiment_range']
+                    st.metric("Sentiment Range", f"{sentiment_range['min']:.2f} to {sentiment_range['max']:.2f}")
+        
         with st.spinner(""):
             try:
                 # Show initial status
                 status_placeholder.info("🔄 Starting analysis for " + ticker)
                 
-                # Initialize Twitter functionality only when needed
+                # Initialize Twitter functionality only when needed; skipped once logged in
                 try:
-                    status_placeholder.info("🔄 Initializing Twitter connection...")
-                    asyncio.run(analyzer.init())
+                    if not analyzer.twitter_initialized:
+                        status_placeholder.info("🔄 Initializing Twitter connection...")
+                    get_inited_analyzer()
                 except Exception as e:
                     status_placeholder.error("❌ Failed to connect to Twitter. Please check your credentials.")
                     st.error(f"Technical details: {str(e)}")
@@ -170,8 +251,18 @@ if analysis_type == "Crypto Ticker Analysis":
                 def update_progress(message):
                     status_placeholder.info(f"🔄 {message}")
                 
+                # Stream the summary into the results area as tokens arrive
+                summary_tokens = []
+                
+                async def on_token(token):
+                    summary_tokens.append(token)
+                    result_placeholder.markdown("".join(summary_tokens))
+                
                 # Get the analysis result with progress updates
-                result = asyncio.run(analyzer.analyze_crypto_ticker(ticker, hours, max_tweets, update_progress))
+                result = run_async(analyzer.analyze_crypto_ticker(
+                    ticker, hours, max_tweets, update_progress, on_token,
+                    use_batch_api=use_batch, on_stats=show_stats
+                ))
                 
                 if 'error' in result:
                     status_placeholder.error(f"""
@@ -184,53 +275,49 @@ if analysis_type == "Crypto Ticker Analysis":
                     # Show success and results
                     status_placeholder.success("✅ Analysis complete!")
                     
+                    show_stats(result['weighted_sentiment'], result['stats'])
+                    
                     with result_placeholder.container():
-                        # Display overall sentiment and stats
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.metric("Weighted Sentiment", f"{result['weighted_sentiment']:.2f}")
-                            st.metric("Tweet Count", result['stats']['tweet_count'])
-                        with col2:
-                            st.metric("Average Engagement", f"{result['stats']['avg_engagement']:.1f}")
-                            sentiment_range = result['stats']['sentiment_range']
-                            st.metric("Sentiment Range", f"{sentiment_range['min']:.2f} to {sentiment_range['max']:.2f}")
-                        
                         # Display the analysis
                         st.header("Analysis Summary")
                         
                         # Format and display the analysis content
                         analysis_text = result['analysis_content']
                         
-                        # Split into sections
-                        sections = analysis_text.split('\n\n')
-                        
-                        for section in sections:
-                            if section.strip():
-                                # Check if it's a header
-                                if section.startswith(('Analysis Summary', 'Comprehensive Analysis')):
-                                    st.subheader(section.strip())
-                                # Check if it's a numbered section
-                                elif any(section.startswith(str(i) + '.') for i in range(1, 6)):
-                                    st.subheader(section.split('\n')[0].strip())
-                                    # Display the content after the header
-                                    content = '\n'.join(section.split('\n')[1:])
-                                    st.write(content.strip())
-                                # Check if it's the conclusion
-                                elif section.lower().startswith('conclusion'):
-                                    st.subheader("Conclusion")
-                                    st.write(section[len('Conclusion:'):].strip())
-                                else:
-                                    st.write(section.strip())
+                        # Split into sections and tag each one with a single regex match
+                        for section in SECTION_SPLIT(analysis_text):
+                            section = section.strip()
+                            if not section:
+                                continue
+                            match = SECTION_RE.match(section)
+                            kind = match.lastgroup if match else None
+                            
+                            if kind == 'sum':
+                                st.subheader(section)
+                            elif kind == 'num':
+                                # Display the header, then the content after it
+                                header, _, content = section.partition('\n')
+                                st.subheader(header.strip())
+                                st.write(content.strip())
+                            elif kind == 'con':
+                                st.subheader("Conclusion")
+                                st.write(section[match.end():].lstrip(':').strip())
+                            else:
+                                st.write(section)
                         
                         # Show detailed tweet analysis in an expander
                         with st.expander("🔍 View Individual Tweet Analysis"):
                             st.write("Here are the individual tweets I analyzed:")
+                            # Build the whole list first so it is sent to the browser in one message
+                            tweet_parts = []
                             for idx, analysis in enumerate(result['individual_analyses'], 1):
-                                st.markdown(f"**Tweet {idx}**")
-                                st.markdown(f"*Sentiment: {analysis['sentiment_score']:.2f} | "
-                                          f"Engagement: {analysis['engagement']}*")
-                                st.text(analysis['text'][:200] + "..." if len(analysis['text']) > 200 else analysis['text'])
-                                st.markdown("---")
+                                text = analysis['text'][:200] + "..." if len(analysis['text']) > 200 else analysis['text']
+                                tweet_parts.append(
+                                    f"**Tweet {idx}**\n\n"
+                                    f"*Sentiment: {analysis['sentiment_score']:.2f} | Engagement: {analysis['engagement']}*\n\n"
+                                    f"{escape_markdown(text)}\n\n---\n"
+                                )
+                            st.markdown("\n".join(tweet_parts))
                     
             except Exception as e:
                 status_placeholder.error("""
@@ -276,11 +363,14 @@ elif analysis_type == "Technical Analysis":
             help="Select the historical data period"
         )
     
+    refresh = st.checkbox("Refresh price data", value=False, help="Download fresh prices instead of reusing recently cached data")
+    
     if st.button("Analyze"):
         with st.spinner("Analyzing price patterns..."):
             try:
-                # Initialize pattern detector
-                detector = PatternDetector()
+                detector = get_pattern_detector()
+                if refresh:
+                    detector.invalidate(symbol, interval, period)
                 
                 # Fetch data
                 df = detector.fetch_data(symbol, interval, period)
@@ -289,8 +379,8 @@ elif analysis_type == "Technical Analysis":
                     # Add technical indicators
                     df = detector.add_technical_indicators(df)
                     
-                    # Get AI analysis
-                    analysis = detector.detect_patterns(df)
+                    # Get AI analysis (one combined request)
+                    analysis = run_async(detector.detect_patterns_async(df))
                     
                     # Create two columns for display
                     col1, col2 = st.columns([2, 1])
@@ -305,8 +395,8 @@ elif analysis_type == "Technical Analysis":
                         
                         # Pattern Analysis
                         with st.expander("🎯 Pattern Analysis", expanded=True):
-                            if analysis['patterns']:
-                                pattern_data = json.loads(analysis['patterns'])
+                            pattern_data = analysis['patterns']
+                            if pattern_data:
                                 st.write("**Detected Patterns:**")
                                 for pattern in pattern_data.get('patterns', []):
                                     st.write(f"- {pattern}")
@@ -315,8 +405,8 @@ elif analysis_type == "Technical Analysis":
                         
                         # Market Regime
                         with st.expander("🌊 Market Regime", expanded=True):
-                            if analysis['market_regime']:
-                                regime_data = json.loads(analysis['market_regime'])
+                            regime_data = analysis['market_regime']
+                            if regime_data:
                                 st.write(f"**Current Regime:** {regime_data.get('regime', 'Unknown')}")
                                 st.write(f"**Confidence:** {regime_data.get('confidence', 'N/A')}%")
                                 st.write("**Characteristics:**")
@@ -325,8 +415,8 @@ elif analysis_type == "Technical Analysis":
                         
                         # Price Prediction
                         with st.expander("🎯 Price Prediction", expanded=True):
-                            if analysis['price_prediction']:
-                                pred_data = json.loads(analysis['price_prediction'])
+                            pred_data = analysis['price_prediction']
+                            if pred_data:
                                 st.write(f"**Target (24h):** {pred_data.get('price_target', 'N/A')}")
                                 st.write(f"**Confidence:** {pred_data.get('confidence', 'N/A')}%")
                                 st.write("**Key Factors:**")
@@ -338,8 +428,8 @@ elif analysis_type == "Technical Analysis":
                         
                         # Support/Resistance
                         with st.expander("📊 Support & Resistance", expanded=True):
-                            if analysis['support_resistance']:
-                                sr_data = json.loads(analysis['support_resistance'])
+                            sr_data = analysis['support_resistance']
+                            if sr_data:
                                 st.write("**Support Levels:**")
                                 for level in sr_data.get('support_levels', []):
                                     st.write(f"- Price: {level['price']}, Strength: {level['strength']}/10")
@@ -397,9 +487,9 @@ elif analysis_type == "Single Text Analysis":
                     
                     st.subheader("Chain of Thought Breakdown")
                     steps = result['analysis'].split('\n')
-                    for i, step in enumerate(steps, 1):
-                        if step.strip():
-                            st.markdown(f"**Step {i}:** {step}")
+                    st.markdown("\n\n".join(
+                        f"**Step {i}:** {step}" for i, step in enumerate(steps, 1) if step.strip()
+                    ))
                 except Exception as e:
                     st.error(f"Error analyzing text: {str(e)}")
 
@@ -416,7 +506,7 @@ else:
         if all(texts):
             with st.spinner("Analyzing multiple sources..."):
                 try:
-                    result = analyzer.analyze_multiple_sources(texts)
+                    result = analyzer.analyze_multiple_sources(texts, use_batch=use_batch)
                     
                     if result:
                         # Display aggregate results
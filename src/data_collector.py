@@ -1,79 +1,434 @@
 import os
 import pandas as pd
-from datetime import datetime, timedelta
-from newspaper import Article
-from bs4 import BeautifulSoup
-import requests
+from datetime import datetime
 from dotenv import load_dotenv
-import json
-from selenium import webdriver
-from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.firefox.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.firefox import GeckoDriverManager
+import orjson
 import time
 import random
 import asyncio
+import aiohttp
+from yarl import URL
+from urllib.parse import quote_plus
 import platform
+from collections import deque
 import subprocess
+import re
+import hashlib
+import numpy as np
+
+# Read the .env file once at import
+load_dotenv()
+
+# Seconds to reuse search results for the same ticker and time window
+TWITTER_CACHE_TTL = float(os.getenv('TWITTER_CACHE_TTL', 60))
+
+# Public bearer token used by the x.com web client for its own API calls
+TWITTER_BEARER_TOKEN = 'AAAAAAAAAAAAAAAAAAAAANRILgAAAAAAnNwIzUejRCOuH5E6I8xnZz4puTs%3D1Zv7ttfk8LF81IUq16cHjhLTvJu4FA33AGWWjCpTnA'
+GUEST_ACTIVATE_URL = 'https://api.twitter.com/1.1/guest/activate.json'
+SEARCH_TIMELINE_URL = 'https://x.com/i/api/graphql/nK1dw4oV3k4w5TdtcAdSww/SearchTimeline'
+SEARCH_PAGE_SIZE = 20
+# Statuses the API answers with once a guest token has expired
+GUEST_TOKEN_EXPIRED_STATUSES = (401, 403)
+
+# Browser login cookies that authenticate API calls as the logged-in account
+API_AUTH_COOKIES = ('auth_token', 'ct0')
+
+# Engagement counts are shown abbreviated on the page, e.g. "1,024", "1.2K" or "3.4M"
+COUNT_RE = re.compile(r'^([\d.]+)\s*([KMB]?)', re.I)
+COUNT_MULTIPLIERS = {'': 1, 'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+ENGAGEMENT_COLUMNS = ['likes', 'retweets', 'replies']
+
+# Scraped tweets are collected as tuples in this column order and only become a DataFrame once
+TWEET_COLUMNS = ['text', 'username', 'timestamp'] + ENGAGEMENT_COLUMNS
+
+# Selenium locator strategies (the values of By.CSS_SELECTOR and By.XPATH), kept as plain strings
+# so Selenium is only imported once the browser is actually needed
+CSS_SELECTOR = 'css selector'
+XPATH = 'xpath'
+
+# Login page locators; each stage waits for the first of its locators to match
+USERNAME_LOCATORS = tuple((CSS_SELECTOR, selector) for selector in (
+    "input[autocomplete='username']",
+    "input[name='text']",
+    "input[autocomplete='email']"
+))
+NEXT_BUTTON_LOCATORS = tuple((XPATH, selector) for selector in (
+    "//div[@role='button'][.//span[text()='Next']]",
+    "//span[text()='Next']/..",
+    "//div[contains(@class, 'next')]"
+))
+EMAIL_LOCATORS = tuple((CSS_SELECTOR, selector) for selector in (
+    "input[autocomplete='email']",
+    "input[name='text']",
+    "input[type='text']"
+))
+PASSWORD_LOCATORS = tuple((CSS_SELECTOR, selector) for selector in (
+    "input[autocomplete='current-password']",
+    "input[name='password']",
+    "input[type='password']"
+))
+LOGIN_BUTTON_LOCATORS = tuple((XPATH, selector) for selector in (
+    "//div[@role='button'][.//span[text()='Log in']]",
+    "//span[text()='Log in']/..",
+    "//div[contains(@data-testid, 'LoginButton')]"
+))
+TWOFA_LOCATORS = tuple((CSS_SELECTOR, selector) for selector in (
+    "input[autocomplete='one-time-code']",
+    "input[name='text']",
+    "input[inputmode='numeric']"
+))
+VERIFY_BUTTON_LOCATORS = tuple((XPATH, selector) for selector in (
+    "//div[@role='button'][.//span[text()='Verify']]",
+    "//span[text()='Verify']/..",
+    "//div[contains(@data-testid, 'VerifyButton')]"
+))
+LOGIN_SUCCESS_LOCATORS = tuple((CSS_SELECTOR, selector) for selector in (
+    "div[data-testid='primaryColumn']",
+    "div[data-testid='AppTabBar_Home_Link']",
+    "a[aria-label='Home']"
+))
+
+# Login cookies are kept between runs so the browser login flow only runs when they expire
+COOKIE_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'crypto_sentiment', 'cookies.json')
+
+# Near-duplicate detection: tweets whose 64-bit SimHashes agree on ~85% of bits are merged
+SIMHASH_TOKEN_RE = re.compile(r"[a-z0-9$#]+")
+SIMHASH_MAX_DISTANCE = 9
+
+# Extracts the fields of every rendered tweet inside the page so it is read in one WebDriver call
+TWEET_DATA_SCRIPT = """
+return Array.from(document.querySelectorAll("[data-testid='tweet']")).map(tweet => {
+    const text = tweet.querySelector("[data-testid='tweetText']");
+    const user = tweet.querySelector("[data-testid='User-Name']");
+    const time = tweet.querySelector("time");
+    const link = tweet.querySelector("a[href*='/status/']");
+    return {
+        text: text ? text.innerText : null,
+        username: user ? user.innerText : null,
+        timestamp: time ? time.getAttribute("datetime") : null,
+        href: link ? link.getAttribute("href") : null,
+        metrics: Array.from(tweet.querySelectorAll("[data-testid$='-count']")).map(m => m.innerText.trim())
+    };
+});
+"""
+
+# Feature flags the SearchTimeline GraphQL endpoint expects alongside its variables
+SEARCH_FEATURES = {
+    'rweb_lists_timeline_redesign_enabled': True,
+    'responsive_web_graphql_exclude_directive_enabled': True,
+    'verified_phone_label_enabled': False,
+    'creator_subscriptions_tweet_preview_api_enabled': True,
+    'responsive_web_graphql_timeline_navigation_enabled': True,
+    'responsive_web_graphql_skip_user_profile_image_extensions_enabled': False,
+    'tweetypie_unmention_optimization_enabled': True,
+    'responsive_web_edit_tweet_api_enabled': True,
+    'graphql_is_translatable_rweb_tweet_is_translatable_enabled': True,
+    'view_counts_everywhere_api_enabled': True,
+    'longform_notetweets_consumption_enabled': True,
+    'responsive_web_twitter_article_tweet_consumption_enabled': False,
+    'tweet_awards_web_tipping_enabled': False,
+    'freedom_of_speech_not_reach_fetch_enabled': True,
+    'standardized_nudges_misinfo': True,
+    'tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled': True,
+    'longform_notetweets_rich_text_read_enabled': True,
+    'longform_notetweets_inline_media_enabled': True,
+    'responsive_web_media_download_video_enabled': False,
+    'responsive_web_enhance_cards_enabled': False
+}
+
+def parse_counts(values):
+    """Parse a Series of abbreviated engagement counts ("1.2K", "3M") into ints, 0 where there is none"""
+    parts = values.fillna('').astype(str).str.strip().str.replace(',', '', regex=False).str.extract(COUNT_RE)
+    numbers = pd.to_numeric(parts[0], errors='coerce')
+    multipliers = parts[1].fillna('').str.upper().map(COUNT_MULTIPLIERS)
+    return (numbers * multipliers).round().fillna(0).astype('int64')
+
+def simhash(text):
+    """Compute a 64-bit SimHash fingerprint of a text from its word tokens"""
+    tokens = SIMHASH_TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return 0
+        
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big') for token in tokens],
+        dtype=np.uint64
+    )
+    # Each token votes +1/-1 on every bit; the fingerprint keeps the bits with a positive vote
+    bits = (hashes[:, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)
+    votes = (2 * bits.astype(np.int64) - 1).sum(axis=0)
+    return sum(1 << bit for bit in np.flatnonzero(votes > 0).tolist())
+
+def dedupe_near_duplicates(df, max_distance=SIMHASH_MAX_DISTANCE):
+    """
+    Collapse near-duplicate tweets, keeping the most engaged tweet of each group.
+    The kept tweet's engagement becomes the sum over its group.
+    """
+    if df.empty:
+        return df
+        
+    df = df.sort_values('engagement', ascending=False, kind='stable')
+    representatives = []  # (fingerprint, row label)
+    group_engagement = {}
+    
+    for label, text, engagement in zip(df.index, df['text'], df['engagement']):
+        fingerprint = simhash(text)
+        for rep_fingerprint, rep_label in representatives:
+            if bin(fingerprint ^ rep_fingerprint).count('1') <= max_distance:
+                group_engagement[rep_label] += engagement
+                break
+        else:
+            representatives.append((fingerprint, label))
+            group_engagement[label] = engagement
+    
+    deduped = df.loc[[label for _, label in representatives]].copy()
+    deduped['engagement'] = pd.Series(group_engagement)
+    return deduped
+
+class RateLimitError(Exception):
+    """Raised by a request when the remote service asks the client to slow down"""
 
 class RequestQueue:
-    def __init__(self):
-        self.queue = []
-        self.processing = False
+    # Retry settings for failed requests (seconds)
+    BACKOFF_BASE = 0.5
+    BACKOFF_CAP = 30
+    MAX_RETRIES = 5
+    # HTTP statuses that mean "try again later"
+    RETRY_STATUSES = (429, 503)
+
+    def __init__(self, concurrency=8, rate=None, period=1.0, delay_range=(1.5, 3.5)):
+        """
+        Args:
+            concurrency (int): Maximum number of requests in flight at once
+            rate (int): Maximum number of requests started per `period` seconds (None for no limit)
+            period (float): Length of the rate-limit window in seconds
+            delay_range (tuple): Random pause after each request, or None for no pause
+        """
+        self.concurrency = concurrency
+        self.rate = rate
+        self.period = period
+        self.delay_range = delay_range
+        self.semaphore = None
+        self._rate_lock = None
+        self._request_times = deque()
+        self._loop = None
 
     async def add(self, request):
-        """Add a request to the queue and process it"""
-        return await self._add_to_queue(request)
-
-    async def _add_to_queue(self, request):
-        """Helper method to add request to queue"""
-        future = asyncio.Future()
-        self.queue.append((request, future))
-        await self._process_queue()
-        return await future
-
-    async def _process_queue(self):
-        """Process queued requests with rate limiting"""
-        if self.processing or not self.queue:
+        """Run a request once a slot is free, retrying failures with backoff"""
+        self._bind_loop()
+        attempts = 0
+        while True:
+            error = None
+            async with self.semaphore:
+                await self._wait_for_rate_limit()
+                try:
+                    result = await request()
+                except Exception as e:
+                    error = e
+                await self._random_delay()
+                
+            if error is None:
+                return result
+            if attempts >= self.MAX_RETRIES or not self._is_retryable(error):
+                raise error
+                
+            # Back off outside the semaphore so other requests keep flowing
+            await self._exponential_backoff(attempts, error)
+            attempts += 1
+
+    def _bind_loop(self):
+        """Create the loop-bound primitives on first use"""
+        # Semaphores and locks belong to a single event loop, so rebuild them if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
             return
             
-        self.processing = True
-        
-        while self.queue:
-            request, future = self.queue[0]
-            try:
-                result = await request()
-                future.set_result(result)
-            except Exception as e:
-                future.set_exception(e)
-                await self._exponential_backoff(len(self.queue))
-            
-            self.queue.pop(0)
-            await self._random_delay()
+        self._loop = loop
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self._rate_lock = asyncio.Lock()
+        self._request_times = deque()
+
+    async def _wait_for_rate_limit(self):
+        """Wait until starting another request keeps within `rate` requests per `period`"""
+        if not self.rate:
+            return
             
-        self.processing = False
+        async with self._rate_lock:
+            now = self._loop.time()
+            # Sliding window of recent start times
+            while self._request_times and now - self._request_times[0] >= self.period:
+                self._request_times.popleft()
+            if len(self._request_times) >= self.rate:
+                await asyncio.sleep(self.period - (now - self._request_times[0]))
+                self._request_times.popleft()
+            self._request_times.append(self._loop.time())
+
+    def _is_retryable(self, error):
+        """Only rate limits and transient network errors are worth retrying"""
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in self.RETRY_STATUSES
+        return isinstance(error, (RateLimitError, aiohttp.ClientError, asyncio.TimeoutError))
+
+    def _backoff_delay(self, attempts, error=None):
+        """Capped exponential delay with jitter for a request that has failed `attempts` times"""
+        # A server that says when to come back knows better than our guess
+        retry_after = self._retry_after(error)
+        if retry_after is not None:
+            return min(self.BACKOFF_CAP, retry_after)
+        return min(self.BACKOFF_CAP, self.BACKOFF_BASE * 2 ** attempts) * random.uniform(0.5, 1.5)
 
-    async def _exponential_backoff(self, retry_count):
+    @staticmethod
+    def _retry_after(error):
+        """Seconds requested by a Retry-After header on a failed response, or None"""
+        headers = getattr(error, 'headers', None)
+        if not headers:
+            return None
+        try:
+            return max(0.0, float(headers.get('Retry-After')))
+        except (TypeError, ValueError):
+            return None
+
+    async def _exponential_backoff(self, attempts, error=None):
         """Implement exponential backoff"""
-        delay = 2 ** retry_count
-        await asyncio.sleep(delay)
+        await asyncio.sleep(self._backoff_delay(attempts, error))
 
     async def _random_delay(self):
         """Add random delay between requests"""
-        delay = random.uniform(1.5, 3.5)
-        await asyncio.sleep(delay)
+        if self.delay_range:
+            delay = random.uniform(*self.delay_range)
+            await asyncio.sleep(delay)
 
 class TwitterScraper:
     def __init__(self):
         self.driver = None
         self.request_queue = RequestQueue()
         self.cookies = None
+        self.session = None
+        self.guest_token = None
+        self._driver_lock = None
+        
+        # Build the TOTP generator once; it is only needed for accounts with 2FA
+        twofa_secret = os.getenv('TWITTER_2FA_SECRET')
+        self._totp = self._build_totp(twofa_secret) if twofa_secret else None
+
+    @staticmethod
+    def _build_totp(twofa_secret):
+        """Create a TOTP generator for a base32 2FA secret"""
+        import pyotp
+        return pyotp.TOTP(twofa_secret)
+
+    def _generate_2fa_code(self, twofa_secret):
+        """Return the current 2FA code, reusing the cached TOTP for the secret"""
+        if self._totp is None or self._totp.secret != twofa_secret:
+            self._totp = self._build_totp(twofa_secret)
+        return self._totp.now()
+
+    async def __aenter__(self):
+        """Start the browser once for the lifetime of the context"""
+        if not self.driver and not await self._run_blocking(self.init_driver):
+            raise Exception("Failed to initialize Firefox driver")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Quit the browser and close the HTTP session"""
+        if self.driver:
+            try:
+                await self._run_blocking(self.driver.quit)
+            except Exception as e:
+                print(f"Error closing Firefox driver: {str(e)}")
+            self.driver = None
+            
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def _run_blocking(self, func, *args):
+        """Run a blocking Selenium call on the executor so the event loop keeps running"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def _find_element(self, locators, timeout, clickable=False):
+        """Return the first visible (or clickable) element matching any of the locators, or None"""
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        
+        condition = EC.element_to_be_clickable if clickable else EC.visibility_of_element_located
+        # Poll every locator within one wait so a missing selector doesn't cost a full timeout each
+        try:
+            return await self._run_blocking(
+                WebDriverWait(self.driver, timeout).until,
+                EC.any_of(*(condition(locator) for locator in locators))
+            )
+        except Exception:
+            return None
+
+    async def _get_session(self):
+        """Return the shared keep-alive HTTP session, creating it on first use"""
+        # Created lazily so the session binds to the event loop that actually runs it
+        if self.session is None or self.session.closed:
+            # Pool as many keep-alive connections as the queue runs requests, and cache DNS lookups
+            connector = aiohttp.TCPConnector(limit=self.request_queue.concurrency, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(connector=connector, headers={
+                'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0',
+                'Accept-Encoding': 'gzip, deflate'
+            })
+            self._apply_login_cookies()
+        return self.session
+
+    def _login_cookie(self, name):
+        """Return the value of a browser login cookie, if logged in"""
+        for cookie in self.cookies or []:
+            if cookie.get('name') == name:
+                return cookie.get('value')
+        return None
+
+    def _apply_login_cookies(self):
+        """Copy the browser's auth cookies into the API session's cookie jar"""
+        if self.session is None or self.session.closed or not self.cookies:
+            return
+            
+        auth_cookies = {
+            cookie['name']: cookie['value']
+            for cookie in self.cookies
+            if cookie.get('name') in API_AUTH_COOKIES
+        }
+        if auth_cookies:
+            self.session.cookie_jar.update_cookies(auth_cookies, URL('https://x.com/'))
+
+    async def _activate_guest_token(self):
+        """Fetch a guest token for the GraphQL API and store it on the scraper"""
+        session = await self._get_session()
+        async with session.post(
+            GUEST_ACTIVATE_URL,
+            headers={'Authorization': f'Bearer {TWITTER_BEARER_TOKEN}'}
+        ) as response:
+            response.raise_for_status()
+            data = orjson.loads(await response.read())
+        self.guest_token = data['guest_token']
+        return self.guest_token
+
+    def _api_headers(self):
+        """Headers required by the GraphQL API"""
+        headers = {
+            'Authorization': f'Bearer {TWITTER_BEARER_TOKEN}',
+            'x-twitter-active-user': 'yes',
+            'Content-Type': 'application/json'
+        }
+        # Logged-in requests authenticate with the session cookies plus the matching CSRF token
+        csrf_token = self._login_cookie('ct0')
+        if csrf_token:
+            headers['x-csrf-token'] = csrf_token
+            headers['x-twitter-auth-type'] = 'OAuth2Session'
+        else:
+            headers['x-guest-token'] = self.guest_token
+        return headers
         
     def init_driver(self):
         """Initialize Firefox driver with appropriate options"""
+        from selenium import webdriver
+        from selenium.webdriver.firefox.options import Options
+        
         try:
             print("Setting up Firefox options...")
             firefox_options = Options()
@@ -85,17 +440,21 @@ class TwitterScraper:
             firefox_options.add_argument('--disable-dev-shm-usage')
             firefox_options.set_preference("dom.webdriver.enabled", False)
             firefox_options.set_preference('useAutomationExtension', False)
-            
-            print("Installing GeckoDriver...")
-            service = Service(GeckoDriverManager().install())
+            # Tweets are read from text only, so skip images, web fonts, media autoplay and the disk cache
+            firefox_options.set_preference('permissions.default.image', 2)
+            firefox_options.set_preference('browser.display.use_document_fonts', 0)
+            firefox_options.set_preference('media.autoplay.default', 5)
+            firefox_options.set_preference('browser.cache.disk.enable', False)
+            firefox_options.set_preference('network.http.max-persistent-connections-per-server', 8)
             
             print("Initializing Firefox driver...")
-            # self.driver = webdriver.Firefox(service=service, options=firefox_options)
+            # Selenium Manager resolves and caches geckodriver itself
             self.driver = webdriver.Firefox(options=firefox_options)
             # Set various timeouts
             print("Configuring timeouts...")
             self.driver.set_page_load_timeout(30)
-            self.driver.implicitly_wait(10)
+            # Explicit waits only; an implicit wait would stall every any_of poll on a missing locator
+            self.driver.implicitly_wait(0)
             
             print("Firefox driver initialized successfully!")
             return True
@@ -114,85 +473,91 @@ class TwitterScraper:
                 self.driver = None
             return False
 
+    def _save_cookies(self):
+        """Persist the browser cookies so later runs can skip the login flow"""
+        try:
+            os.makedirs(os.path.dirname(COOKIE_CACHE_PATH), exist_ok=True)
+            # The cookies grant account access, so keep the file private to the user
+            fd = os.open(COOKIE_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(self.cookies))
+        except Exception as e:
+            print(f"Could not save cookies: {str(e)}")
+
+    def _load_cookies(self):
+        """Load cookies saved by a previous login, if any"""
+        try:
+            with open(COOKIE_CACHE_PATH, 'rb') as f:
+                return orjson.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Could not load saved cookies: {str(e)}")
+            return None
+
+    async def restore_session(self):
+        """Log in with saved cookies instead of the full login flow"""
+        cookies = self._load_cookies()
+        if not cookies:
+            return False
+            
+        if not self.driver and not await self._run_blocking(self.init_driver):
+            return False
+            
+        print("Restoring saved Twitter session...")
+        # Cookies can only be added for the domain that is currently loaded
+        await self._run_blocking(self.driver.get, 'https://x.com')
+        for cookie in cookies:
+            try:
+                await self._run_blocking(self.driver.add_cookie, cookie)
+            except Exception:
+                continue
+                
+        if await self.is_logged_in():
+            print("Saved session restored!")
+            self.cookies = cookies
+            self._apply_login_cookies()
+            return True
+            
+        print("Saved session expired, logging in again...")
+        try:
+            os.remove(COOKIE_CACHE_PATH)
+        except OSError:
+            pass
+        return False
+
     async def login(self, username, password, email=None, twofa_secret=None):
         """Login to Twitter using browser automation"""
-        if not self.driver and not self.init_driver():
+        if not self.driver and not await self._run_blocking(self.init_driver):
             raise Exception("Failed to initialize Firefox driver")
             
         try:
             print("Navigating to Twitter login page...")
-            self.driver.get('https://x.com/login')
-            time.sleep(5)  # Increased wait for initial page load
+            await self._run_blocking(self.driver.get, 'https://x.com/login')
+            await asyncio.sleep(5)  # Increased wait for initial page load
             
             print("Entering username...")
-            # Try multiple possible selectors for username field
-            username_selectors = [
-                "input[autocomplete='username']",
-                "input[name='text']",
-                "input[autocomplete='email']"
-            ]
-            
-            username_input = None
-            for selector in username_selectors:
-                try:
-                    username_input = WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    if username_input.is_displayed():
-                        break
-                except:
-                    continue
+            username_input = await self._find_element(USERNAME_LOCATORS, 5)
             
             if not username_input:
                 raise Exception("Could not find username input field")
                 
             username_input.clear()
             username_input.send_keys(username)
-            time.sleep(2)
+            await asyncio.sleep(2)
             
             print("Clicking Next button...")
-            # Try multiple possible selectors for next button
-            next_button_selectors = [
-                "//div[@role='button'][.//span[text()='Next']]",
-                "//span[text()='Next']/..",
-                "//div[contains(@class, 'next')]"
-            ]
-            
-            next_button = None
-            for selector in next_button_selectors:
-                try:
-                    next_button = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    if next_button.is_displayed():
-                        break
-                except:
-                    continue
+            next_button = await self._find_element(NEXT_BUTTON_LOCATORS, 5, clickable=True)
             
             if not next_button:
                 raise Exception("Could not find next button")
                 
             next_button.click()
-            time.sleep(3)
+            await asyncio.sleep(3)
             
             # Check if email verification is requested
             try:
-                email_input = None
-                email_selectors = [
-                    "input[autocomplete='email']",
-                    "input[name='text']",
-                    "input[type='text']"
-                ]
-                
-                for selector in email_selectors:
-                    try:
-                        email_input = WebDriverWait(self.driver, 3).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                        )
-                        if email_input.is_displayed():
-                            break
-                    except:
-                        continue
+                email_input = await self._find_element(EMAIL_LOCATORS, 3)
                 
                 if email_input:
                     print("Email verification requested...")
@@ -201,23 +566,14 @@ class TwitterScraper:
                     
                     email_input.clear()
                     email_input.send_keys(email)
-                    time.sleep(1)
+                    await asyncio.sleep(1)
                     
                     # Click next after entering email
-                    next_button = None
-                    for selector in next_button_selectors:
-                        try:
-                            next_button = WebDriverWait(self.driver, 5).until(
-                                EC.element_to_be_clickable((By.XPATH, selector))
-                            )
-                            if next_button.is_displayed():
-                                break
-                        except:
-                            continue
+                    next_button = await self._find_element(NEXT_BUTTON_LOCATORS, 5, clickable=True)
                     
                     if next_button:
                         next_button.click()
-                        time.sleep(3)
+                        await asyncio.sleep(3)
                     else:
                         raise Exception("Could not find next button after email input")
             except Exception as e:
@@ -227,23 +583,7 @@ class TwitterScraper:
                 pass
             
             print("Entering password...")
-            # Try multiple possible selectors for password field
-            password_selectors = [
-                "input[autocomplete='current-password']",
-                "input[name='password']",
-                "input[type='password']"
-            ]
-            
-            password_input = None
-            for selector in password_selectors:
-                try:
-                    password_input = WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    if password_input.is_displayed():
-                        break
-                except:
-                    continue
+            password_input = await self._find_element(PASSWORD_LOCATORS, 5)
             
             if not password_input:
                 # Take a screenshot and save page source for debugging
@@ -254,107 +594,48 @@ class TwitterScraper:
                 
             password_input.clear()
             password_input.send_keys(password)
-            time.sleep(2)
+            await asyncio.sleep(2)
             
             print("Clicking Login button...")
-            # Try multiple possible selectors for login button
-            login_button_selectors = [
-                "//div[@role='button'][.//span[text()='Log in']]",
-                "//span[text()='Log in']/..",
-                "//div[contains(@data-testid, 'LoginButton')]"
-            ]
-            
-            login_button = None
-            for selector in login_button_selectors:
-                try:
-                    login_button = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    if login_button.is_displayed():
-                        break
-                except:
-                    continue
+            login_button = await self._find_element(LOGIN_BUTTON_LOCATORS, 5, clickable=True)
             
             if not login_button:
                 raise Exception("Could not find login button")
                 
             login_button.click()
-            time.sleep(5)  # Increased wait after login
+            await asyncio.sleep(5)  # Increased wait after login
             
             # Check if 2FA is requested
             try:
-                twofa_selectors = [
-                    "input[autocomplete='one-time-code']",
-                    "input[name='text']",
-                    "input[inputmode='numeric']"
-                ]
-                
-                twofa_input = None
-                for selector in twofa_selectors:
-                    try:
-                        twofa_input = WebDriverWait(self.driver, 3).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                        )
-                        if twofa_input.is_displayed():
-                            break
-                    except:
-                        continue
+                twofa_input = await self._find_element(TWOFA_LOCATORS, 3)
                 
                 if twofa_input and twofa_secret:
                     print("Handling 2FA...")
                     code = self._generate_2fa_code(twofa_secret)
                     twofa_input.clear()
                     twofa_input.send_keys(code)
-                    time.sleep(2)
-                    
-                    verify_button_selectors = [
-                        "//div[@role='button'][.//span[text()='Verify']]",
-                        "//span[text()='Verify']/..",
-                        "//div[contains(@data-testid, 'VerifyButton')]"
-                    ]
+                    await asyncio.sleep(2)
                     
-                    verify_button = None
-                    for selector in verify_button_selectors:
-                        try:
-                            verify_button = WebDriverWait(self.driver, 3).until(
-                                EC.element_to_be_clickable((By.XPATH, selector))
-                            )
-                            if verify_button.is_displayed():
-                                break
-                        except:
-                            continue
+                    verify_button = await self._find_element(VERIFY_BUTTON_LOCATORS, 3, clickable=True)
                     
                     if verify_button:
                         verify_button.click()
-                        time.sleep(3)
+                        await asyncio.sleep(3)
             except:
                 # 2FA not requested, continue with login
                 pass
             
             print("Waiting for successful login...")
             # Try multiple success indicators
-            success_selectors = [
-                "div[data-testid='primaryColumn']",
-                "div[data-testid='AppTabBar_Home_Link']",
-                "a[aria-label='Home']"
-            ]
-            
-            success_element = None
-            for selector in success_selectors:
-                try:
-                    success_element = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    if success_element.is_displayed():
-                        break
-                except:
-                    continue
+            success_element = await self._find_element(LOGIN_SUCCESS_LOCATORS, 10)
             
             if not success_element:
                 raise Exception("Could not verify successful login")
             
             print("Login successful!")
             self.cookies = self.driver.get_cookies()
+            self._save_cookies()
+            self._apply_login_cookies()
             return True
             
         except Exception as e:
@@ -376,78 +657,231 @@ class TwitterScraper:
             return False
             
         try:
-            self.driver.get('https://twitter.com/home')
-            WebDriverWait(self.driver, 5).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='primaryColumn']"))
-            )
-            return True
+            await self._run_blocking(self.driver.get, 'https://x.com/home')
+            return await self._find_element(LOGIN_SUCCESS_LOCATORS, 5) is not None
         except:
             return False
 
     async def search_tweets(self, query, max_results=100, progress_callback=None):
         """Search for tweets matching query"""
-        tweets = []
         print(f"\nSearching Twitter for: {query}")
         
         try:
-            search_url = f'https://twitter.com/search?q={query}&src=typed_query&f=live'
+            tweets = await self._search_tweets_api(query, max_results)
+        except Exception as e:
+            print(f"Error searching tweets via API: {str(e)}")
+            tweets = pd.DataFrame(columns=TWEET_COLUMNS)
+        
+        # The browser is only needed when the API is unavailable
+        if tweets.empty and self.driver:
+            print("Falling back to browser search...")
+            # One driver serves every search, so concurrent searches take turns with it
+            if self._driver_lock is None:
+                self._driver_lock = asyncio.Lock()
+            async with self._driver_lock:
+                tweets = await self._search_tweets_browser(query, max_results)
+            
+        print(f"\nTotal tweets collected: {len(tweets)}")
+        if not tweets.empty and progress_callback:
+            progress_callback(f"Collected {len(tweets)} tweets from the past {max_results} hours")
+        return tweets
+
+    async def _search_tweets_api(self, query, max_results):
+        """Page through the GraphQL SearchTimeline endpoint until max_results is reached"""
+        # Guest tokens are only needed when there is no logged-in session
+        if not self._login_cookie('ct0') and not self.guest_token:
+            await self._activate_guest_token()
+            
+        tweets = []
+        cursor = None
+        token_refreshed = False
+        while len(tweets) < max_results:
+            try:
+                data = await self.request_queue.add(
+                    lambda cursor=cursor: self._fetch_search_page(query, cursor)
+                )
+            except aiohttp.ClientResponseError as e:
+                # Guest tokens expire; fetch a new one once before falling back to the browser
+                if e.status not in GUEST_TOKEN_EXPIRED_STATUSES or self._login_cookie('ct0') or token_refreshed:
+                    raise
+                print("Guest token rejected, activating a new one...")
+                token_refreshed = True
+                self.guest_token = None
+                await self._activate_guest_token()
+                continue
+            page, cursor = self._parse_search_timeline(data)
+            print(f"Fetched {len(page)} tweets from search API")
+            if not page:
+                break
+                
+            tweets.extend(page[:max_results - len(tweets)])
+            if not cursor:
+                break
+                
+        return pd.DataFrame.from_records(tweets, columns=TWEET_COLUMNS)
+
+    async def _fetch_search_page(self, query, cursor=None):
+        """Fetch one page of search results as JSON"""
+        variables = {
+            'rawQuery': query,
+            'count': SEARCH_PAGE_SIZE,
+            'querySource': 'typed_query',
+            'product': 'Latest'
+        }
+        if cursor:
+            variables['cursor'] = cursor
+            
+        params = {
+            'variables': orjson.dumps(variables).decode('utf-8'),
+            'features': orjson.dumps(SEARCH_FEATURES).decode('utf-8')
+        }
+        session = await self._get_session()
+        async with session.get(SEARCH_TIMELINE_URL, params=params, headers=self._api_headers()) as response:
+            response.raise_for_status()
+            return orjson.loads(await response.read())
+
+    @staticmethod
+    def _parse_search_timeline(data):
+        """Extract tweet rows (in TWEET_COLUMNS order) and the next-page cursor from a SearchTimeline response"""
+        instructions = data['data']['search_by_raw_query']['search_timeline']['timeline']['instructions']
+        tweets = []
+        cursor = None
+        
+        for instruction in instructions:
+            # Cursors are sent either in the added entries or as replacement entries
+            entries = instruction.get('entries', [])
+            if 'entry' in instruction:
+                entries = [instruction['entry']]
+                
+            for entry in entries:
+                content = entry.get('content', {})
+                if content.get('cursorType') == 'Bottom':
+                    cursor = content.get('value')
+                    continue
+                    
+                result = content.get('itemContent', {}).get('tweet_results', {}).get('result')
+                if not result:
+                    continue
+                # Tweets with limited visibility are wrapped in an extra object
+                result = result.get('tweet', result)
+                legacy = result.get('legacy')
+                if not legacy:
+                    continue
+                    
+                user = result.get('core', {}).get('user_results', {}).get('result', {}).get('legacy', {})
+                created_at = datetime.strptime(legacy['created_at'], '%a %b %d %H:%M:%S %z %Y')
+                tweets.append((
+                    legacy.get('full_text', ''),
+                    f"{user.get('name', '')} @{user.get('screen_name', '')}",
+                    created_at.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+                    legacy.get('favorite_count', 0),
+                    legacy.get('retweet_count', 0),
+                    legacy.get('reply_count', 0)
+                ))
+                
+        return tweets, cursor
+
+    @staticmethod
+    def _parse_tweet_fields(fields):
+        """Build a tweet row from the fields read in the page, returning (tweet_id, row) or None"""
+        if not fields.get('text') or not fields.get('username') or not fields.get('timestamp'):
+            return None
+            
+        # The status permalink carries the tweet ID
+        href = fields.get('href')
+        tweet_id = href.split('/status/')[1].split('/')[0] if href else (fields['username'], fields['timestamp'])
+        
+        # Keep the raw engagement strings; they are converted in one pass once collected
+        metrics = fields.get('metrics') or []
+        return tweet_id, (
+            fields['text'],
+            fields['username'],
+            fields['timestamp'],
+            metrics[0] if metrics else '',
+            metrics[1] if len(metrics) > 1 else '',
+            metrics[2] if len(metrics) > 2 else ''
+        )
+
+    def _wait_for_page_growth(self, last_height, timeout=5):
+        """Wait until the page grows past last_height; returns the new height, or None if it never does"""
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.common.exceptions import TimeoutException
+        
+        def grown_height(driver):
+            height = driver.execute_script("return document.body.scrollHeight")
+            return height if height != last_height else False
+            
+        try:
+            return WebDriverWait(self.driver, timeout, poll_frequency=0.25).until(grown_height)
+        except TimeoutException:
+            return None
+
+    async def _search_tweets_browser(self, query, max_results):
+        """Search for tweets by scrolling the live search page in the browser"""
+        tweets = []
+        
+        try:
+            search_url = f'https://twitter.com/search?q={quote_plus(query)}&src=typed_query&f=live'
             print(f"Navigating to search URL: {search_url}")
-            self.driver.get(search_url)
+            # Selenium calls block, so run them on the executor to keep the event loop free
+            await self._run_blocking(self.driver.get, search_url)
             
-            last_height = self.driver.execute_script("return document.body.scrollHeight")
+            last_height = await self._run_blocking(self.driver.execute_script, "return document.body.scrollHeight")
             tweet_count = 0
             scroll_count = 0
             max_scrolls = 10  # Limit scrolling to avoid infinite loops
+            max_stalled_scrolls = 2  # Stop once this many scrolls in a row add no new tweets
+            stalled_scrolls = 0
+            prev_tweet_count = 0
+            
+            seen_ids = set()
             
             while tweet_count < max_results and scroll_count < max_scrolls:
                 print(f"\nScroll {scroll_count + 1}/{max_scrolls}")
-                # Find tweet elements
-                tweet_elements = self.driver.find_elements(By.CSS_SELECTOR, "[data-testid='tweet']")
-                print(f"Found {len(tweet_elements)} tweets on current page")
+                # Pull every rendered tweet's fields in a single WebDriver round-trip
+                tweet_fields = await self._run_blocking(self.driver.execute_script, TWEET_DATA_SCRIPT)
+                print(f"Found {len(tweet_fields)} tweets on current page")
                 
-                for tweet in tweet_elements[tweet_count:]:
-                    try:
-                        # Extract tweet data
-                        text = tweet.find_element(By.CSS_SELECTOR, "[data-testid='tweetText']").text
-                        username = tweet.find_element(By.CSS_SELECTOR, "[data-testid='User-Name']").text
-                        timestamp = tweet.find_element(By.CSS_SELECTOR, "time").get_attribute("datetime")
-                        
-                        # Get engagement metrics
-                        metrics = tweet.find_elements(By.CSS_SELECTOR, "[data-testid$='-count']")
-                        likes = int(metrics[0].text) if metrics else 0
-                        retweets = int(metrics[1].text) if len(metrics) > 1 else 0
-                        replies = int(metrics[2].text) if len(metrics) > 2 else 0
-                        
-                        print(f"\nExtracted Tweet {tweet_count + 1}:")
-                        print(f"Username: {username}")
-                        print(f"Text: {text[:100]}...")  # Print first 100 chars
-                        print(f"Engagement: {likes} likes, {retweets} retweets, {replies} replies")
-                        
-                        tweets.append({
-                            'text': text,
-                            'username': username,
-                            'timestamp': timestamp,
-                            'likes': likes,
-                            'retweets': retweets,
-                            'replies': replies
-                        })
+                for fields in tweet_fields:
+                    parsed = self._parse_tweet_fields(fields)
+                    if parsed is None:
+                        continue
                         
-                        tweet_count += 1
-                        if tweet_count >= max_results:
-                            print("\nReached maximum tweet count")
-                            break
-                            
-                    except Exception as e:
-                        print(f"Error extracting tweet data: {str(e)}")
+                    # Tweets stay in the DOM across scrolls, so skip ones already collected
+                    tweet_id, tweet = parsed
+                    if tweet_id in seen_ids:
                         continue
+                    seen_ids.add(tweet_id)
+                    
+                    text, username, _, likes, retweets, replies = tweet
+                    print(f"\nExtracted Tweet {tweet_count + 1}:")
+                    print(f"Username: {username}")
+                    print(f"Text: {text[:100]}...")  # Print first 100 chars
+                    print(f"Engagement: {likes} likes, {retweets} retweets, {replies} replies")
+                    
+                    tweets.append(tweet)
+                    tweet_count += 1
+                    if tweet_count >= max_results:
+                        print("\nReached maximum tweet count")
+                        break
+                        
+                # The page can keep growing with promoted or "Show more" content that holds no new tweets
+                if tweet_count == prev_tweet_count:
+                    stalled_scrolls += 1
+                    if stalled_scrolls >= max_stalled_scrolls:
+                        print("No new tweets in recent scrolls")
+                        break
+                else:
+                    stalled_scrolls = 0
+                prev_tweet_count = tweet_count
                 
                 # Scroll down
                 print("Scrolling down...")
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
+                await self._run_blocking(self.driver.execute_script, "window.scrollTo(0, document.body.scrollHeight);")
                 
-                new_height = self.driver.execute_script("return document.body.scrollHeight")
-                if new_height == last_height:
+                # Continue as soon as more tweets load instead of sleeping a fixed time
+                new_height = await self._run_blocking(self._wait_for_page_growth, last_height)
+                if new_height is None:
                     print("Reached end of page")
                     break
                     
@@ -457,18 +891,23 @@ class TwitterScraper:
         except Exception as e:
             print(f"Error searching tweets: {str(e)}")
             
-        print(f"\nTotal tweets collected: {len(tweets)}")
-        if tweets:
-            progress_callback(f"Collected {len(tweets)} tweets from the past {max_results} hours")
-        return tweets
+        # Convert the abbreviated engagement counts for every tweet at once
+        df = pd.DataFrame.from_records(tweets, columns=TWEET_COLUMNS)
+        df[ENGAGEMENT_COLUMNS] = df[ENGAGEMENT_COLUMNS].apply(parse_counts)
+        return df
 
 class DataCollector:
     def __init__(self):
-        load_dotenv()
         self.twitter_scraper = TwitterScraper()
+        # (ticker, hours_back, max_tweets) -> (fetch time, tweets DataFrame)
+        self._cache = {}
         
     async def init(self):
         """Initialize the Twitter scraper with login"""
+        # Reuse the saved session while it is still valid
+        if await self.twitter_scraper.restore_session():
+            return
+            
         username = os.getenv('TWITTER_USERNAME')
         password = os.getenv('TWITTER_PASSWORD')
         email = os.getenv('TWITTER_EMAIL')  # Add email from env
@@ -489,6 +928,10 @@ class DataCollector:
         if not success:
             raise Exception("Failed to login to Twitter")
         
+    async def close(self):
+        """Release the scraper's browser and connections"""
+        await self.twitter_scraper.close()
+        
     async def get_twitter_data(self, ticker, hours_back=24, max_tweets=50, progress_callback=None):
         """
         Collect Twitter data for a specific crypto ticker
@@ -502,6 +945,13 @@ class DataCollector:
         if progress_callback is None:
             progress_callback = lambda x: None
             
+        # Back-to-back requests for the same window reuse the last scrape
+        cache_key = (ticker, hours_back, max_tweets)
+        cached = self._cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < TWITTER_CACHE_TTL:
+            print(f"\nUsing cached Twitter data for {ticker}")
+            return cached[1].copy()
+            
         print(f"\nCollecting Twitter data for {ticker} from past {hours_back} hours")
         
         # Enhanced search query:
@@ -514,20 +964,22 @@ class DataCollector:
         search_query = f"{ticker} -is:retweet lang:en"
         print(f"Using search query: {search_query}")
         
-        tweets = await self.twitter_scraper.search_tweets(search_query, max_results=max_tweets, progress_callback=progress_callback)
+        df = await self.twitter_scraper.search_tweets(search_query, max_results=max_tweets, progress_callback=progress_callback)
+        if df.empty:
+            print("Found 0 tweets within time range")
+            return df
         
-        # Filter tweets by time
-        cutoff_time = datetime.utcnow().replace(tzinfo=None)
-        filtered_tweets = [
-            tweet for tweet in tweets 
-            if datetime.fromisoformat(tweet['timestamp'].replace('Z', '')).replace(tzinfo=None) > cutoff_time - timedelta(hours=hours_back)
-        ]
+        # Filter tweets by time with one vectorized parse; unparseable timestamps become NaT and drop out
+        timestamps = pd.to_datetime(df['timestamp'], utc=True, format='ISO8601', errors='coerce').dt.tz_localize(None)
+        cutoff_time = pd.Timestamp.utcnow().tz_localize(None) - pd.Timedelta(hours=hours_back)
+        df = df[timestamps > cutoff_time].reset_index(drop=True)
         
-        print(f"Found {len(filtered_tweets)} tweets within time range")
-        if filtered_tweets:
-            progress_callback(f"Collected {len(filtered_tweets)} tweets from the past {hours_back} hours")
+        print(f"Found {len(df)} tweets within time range")
+        if not df.empty:
+            progress_callback(f"Collected {len(df)} tweets from the past {hours_back} hours")
+            self._cache[cache_key] = (time.monotonic(), df)
         
-        return pd.DataFrame(filtered_tweets)
+        return df.copy()
     
     async def aggregate_data(self, ticker, hours_back=24, max_tweets=50, progress_callback=None):
         """
@@ -544,31 +996,42 @@ class DataCollector:
             
         print(f"\nAggregating data for {ticker}")
         twitter_data = await self.get_twitter_data(ticker, hours_back, max_tweets)
-        all_texts = []
+        sources = pd.DataFrame()
         
         # Process Twitter data
         if not twitter_data.empty:
             print("\nProcessing Twitter data...")
-            # Sort by engagement (likes + retweets + replies)
-            twitter_data['engagement'] = (twitter_data['likes'] + 
-                                        twitter_data['retweets'] + 
-                                        twitter_data['replies'])
-            twitter_data = twitter_data.sort_values('engagement', ascending=False)
+            # Rank by engagement (likes + retweets + replies)
+            twitter_data['engagement'] = twitter_data[ENGAGEMENT_COLUMNS].sum(axis=1)
             
-            # Get top tweets by engagement
+            # Copy-paste tweets only need one LLM call; fold their engagement into one representative
+            tweet_count = len(twitter_data)
+            twitter_data = dedupe_near_duplicates(twitter_data)
+            if len(twitter_data) < tweet_count:
+                print(f"Merged {tweet_count - len(twitter_data)} near-duplicate tweets")
+            
+            # Get top tweets by engagement without sorting the whole frame
             top_tweet_count = max(10, min(max_tweets // 3, 15))
-            top_tweets = twitter_data.head(top_tweet_count)
+            top_tweets = twitter_data.nlargest(top_tweet_count, 'engagement')
             print(f"Selected top {len(top_tweets)} tweets by engagement")
             progress_callback(f"Selected top {len(top_tweets)} most engaged tweets for analysis")
             
-            all_texts.extend([{
-                'text': text,
-                'source': 'twitter',
-                'engagement': engagement
-            } for text, engagement in zip(top_tweets['text'], 
-                                        top_tweets['engagement'])])
+            # Build the output straight from the selected columns
+            sources = top_tweets[['text', 'engagement']].reset_index(drop=True)
+            sources.insert(1, 'source', 'twitter')
         else:
             print("No Twitter data found")
         
-        print(f"\nTotal sources for analysis: {len(all_texts)}")
-        return pd.DataFrame(all_texts) 
\ No newline at end of file
+        print(f"\nTotal sources for analysis: {len(sources)}")
+        return sources
+    
+    async def aggregate_many(self, tickers, hours_back=24, max_tweets=50, progress_callback=None):
+        """
+        Aggregate Twitter data for several tickers concurrently
+        
+        Returns a list of DataFrames in the same order as tickers.
+        """
+        return await asyncio.gather(*(
+            self.aggregate_data(ticker, hours_back, max_tweets, progress_callback)
+            for ticker in tickers
+        ))
\ No newline at end of file
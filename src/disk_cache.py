@@ -0,0 +1,87 @@
+import os
+import sqlite3
+import threading
+import time
+import orjson
+
+# Local caches live next to the saved Twitter session
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'crypto_sentiment')
+
+# Each store is trimmed to this many bytes of values, oldest entries first
+DEFAULT_SIZE_LIMIT = 1 << 30
+
+# Expired and over-limit entries are purged when a store opens and after this many writes
+PURGE_EVERY = 100
+
+class DiskCache:
+    """
+    Values in a local SQLite file, optionally expiring after `ttl` seconds.
+    Values are stored as JSON unless other dumps/loads functions are given.
+    Expired entries are deleted, and the oldest go once the values pass `size_limit` bytes.
+    """
+
+    def __init__(self, path, ttl=None, dumps=orjson.dumps, loads=orjson.loads, size_limit=DEFAULT_SIZE_LIMIT):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl = ttl
+        self.size_limit = size_limit
+        self._writes = 0
+        self._dumps = dumps
+        self._loads = loads
+        # Streamlit reruns scripts on different threads, so share one connection behind a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, stored_at REAL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_stored_at ON cache (stored_at)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.purge()
+
+    def get(self, key, ttl=None):
+        """Return the stored value for a key, or None if it is missing or older than ttl (default self.ttl)"""
+        entry = self.get_entry(key, ttl)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key, ttl=None):
+        """Like get, but return (value, stored_at) so callers can tell how long the value has left"""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            row = self._conn.execute("SELECT value, stored_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        if ttl is not None and time.time() - row[1] > ttl:
+            return None
+        return self._loads(row[0]), row[1]
+
+    def set(self, key, value):
+        """Store a value under a key, replacing any previous one"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, self._dumps(value), time.time())
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % PURGE_EVERY:
+                return
+        self.purge()
+
+    def delete(self, key):
+        """Remove a key if it is stored"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge(self):
+        """Delete entries older than self.ttl, then the oldest entries beyond size_limit bytes"""
+        with self._lock:
+            if self.ttl is not None:
+                self._conn.execute("DELETE FROM cache WHERE stored_at < ?", (time.time() - self.ttl,))
+            # Running total of value sizes from the newest entry back; everything past the limit goes
+            self._conn.execute(
+                """DELETE FROM cache WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(LENGTH(value)) OVER (ORDER BY stored_at DESC, key) AS total FROM cache
+                    ) WHERE total > ?
+                )""",
+                (self.size_limit,)
+            )
+            self._conn.commit()
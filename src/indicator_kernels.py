@@ -0,0 +1,240 @@
+import math
+from functools import lru_cache
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # Without numba the kernels still work, just as plain Python loops
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Each kernel takes contiguous float64 arrays and makes a single pass over them.
+# Outputs match the `ta` library: NaN until the window is filled (ATR, like `ta`, uses zeros).
+# The windowed kernels are inlined into the make_* specializations below, where the windows
+# are compile-time constants that numba can unroll and strength-reduce.
+
+@njit(cache=True, inline='always')
+def _ewm(values, alpha, min_periods):
+    """Recursive EWM seeded with the first non-NaN value (leading NaNs are skipped); NaN until min_periods values are seen"""
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    average = np.nan
+    seen = 0
+    for i in range(n):
+        x = values[i]
+        if math.isnan(x):
+            if seen >= min_periods:
+                out[i] = average
+            continue
+        if seen == 0:
+            average = x
+        else:
+            average = (1.0 - alpha) * average + alpha * x
+        seen += 1
+        if seen >= min_periods:
+            out[i] = average
+    return out
+
+@njit(cache=True, inline='always')
+def ema_kernel(values, span):
+    """Exponential moving average with alpha = 2 / (span + 1), like pandas ewm(span, adjust=False)"""
+    return _ewm(values, 2.0 / (span + 1.0), span)
+
+@njit(cache=True, inline='always')
+def rsi_kernel(close, window):
+    """Wilder's RSI; 100 where there have been no losses"""
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    alpha = 1.0 / window
+    gain_average = 0.0
+    loss_average = 0.0
+    for i in range(n):
+        change = close[i] - close[i - 1] if i > 0 else 0.0
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        if i == 0:
+            gain_average = gain
+            loss_average = loss
+        else:
+            gain_average = (1.0 - alpha) * gain_average + alpha * gain
+            loss_average = (1.0 - alpha) * loss_average + alpha * loss
+        if i >= window - 1:
+            if loss_average == 0:
+                out[i] = 100.0
+            else:
+                out[i] = 100.0 - 100.0 / (1.0 + gain_average / loss_average)
+    return out
+
+@njit(cache=True, inline='always')
+def macd_kernel(close, fast, slow, signal):
+    """MACD line, signal line and histogram"""
+    line = ema_kernel(close, fast) - ema_kernel(close, slow)
+    signal_line = ema_kernel(line, signal)
+    return line, signal_line, line - signal_line
+
+@njit(cache=True, inline='always')
+def bbands_kernel(close, window, deviations):
+    """Upper, middle and lower Bollinger Bands from a rolling mean and population std"""
+    n = close.shape[0]
+    upper = np.full(n, np.nan)
+    middle = np.full(n, np.nan)
+    lower = np.full(n, np.nan)
+    for i in range(window - 1, n):
+        # Two passes over the short window keep the std as accurate as pandas'
+        total = 0.0
+        for j in range(i - window + 1, i + 1):
+            total += close[j]
+        mean = total / window
+        squares = 0.0
+        for j in range(i - window + 1, i + 1):
+            squares += (close[j] - mean) ** 2
+        std = math.sqrt(squares / window)
+        middle[i] = mean
+        upper[i] = mean + deviations * std
+        lower[i] = mean - deviations * std
+    return upper, middle, lower
+
+@njit(cache=True, inline='always')
+def atr_kernel(high, low, close, window):
+    """Wilder's average true range; zero until the first full window, like `ta`"""
+    n = close.shape[0]
+    out = np.zeros(n)
+    if n < window:
+        return out
+    running = 0.0
+    for i in range(n):
+        true_range = high[i] - low[i]
+        if i > 0:
+            true_range = max(true_range, abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        if i < window:
+            # Seed with the simple mean of the first window
+            running += true_range
+            if i == window - 1:
+                out[i] = running / window
+        else:
+            out[i] = (out[i - 1] * (window - 1) + true_range) / window
+    return out
+
+@njit(cache=True, inline='always')
+def returns_volatility_kernel(close, window):
+    """Simple returns and their rolling sample std, like pct_change() and rolling(window).std()"""
+    n = close.shape[0]
+    returns = np.full(n, np.nan)
+    volatility = np.full(n, np.nan)
+    ring = np.zeros(window)
+    mean = 0.0
+    m2 = 0.0
+    count = 0
+    for i in range(1, n):
+        r = close[i] / close[i - 1] - 1.0
+        returns[i] = r
+        slot = count % window
+        if count < window:
+            # Welford's update while the window fills
+            delta = r - mean
+            mean += delta / (count + 1)
+            m2 += delta * (r - mean)
+        else:
+            # Slide the window: swap the oldest return for the new one
+            old = ring[slot]
+            old_mean = mean
+            mean += (r - old) / window
+            m2 += (r - old) * (r - mean + old - old_mean)
+        ring[slot] = r
+        count += 1
+        if count >= window:
+            volatility[i] = math.sqrt(max(m2, 0.0) / (window - 1))
+    return returns, volatility
+
+@njit(cache=True)
+def fill_ohlcv_kernel(ohlcv):
+    """Fill gaps in an (n, 5) Open/High/Low/Close/Volume array in place: Close carries forward, O/H/L fall back to Close, Volume to 0"""
+    last_close = np.nan
+    for i in range(ohlcv.shape[0]):
+        if math.isnan(ohlcv[i, 3]):
+            ohlcv[i, 3] = last_close
+        else:
+            last_close = ohlcv[i, 3]
+        for j in range(3):
+            if math.isnan(ohlcv[i, j]):
+                ohlcv[i, j] = ohlcv[i, 3]
+        if math.isnan(ohlcv[i, 4]):
+            ohlcv[i, 4] = 0.0
+    return ohlcv
+
+@njit(cache=True)
+def lttb_kernel(y, n_out):
+    """Row positions of n_out points chosen by Largest-Triangle-Three-Buckets over y; always keeps the first and last row"""
+    n = y.shape[0]
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[n_out - 1] = n - 1
+    bucket = (n - 2) / (n_out - 2)
+    selected = 0
+    for i in range(n_out - 2):
+        start = int(i * bucket) + 1
+        end = int((i + 1) * bucket) + 1
+        # The third triangle vertex is the average of the next bucket (the last row for the final bucket)
+        next_end = min(int((i + 2) * bucket) + 1, n)
+        average_x = 0.0
+        average_y = 0.0
+        for j in range(end, next_end):
+            average_x += j
+            average_y += y[j]
+        average_x /= next_end - end
+        average_y /= next_end - end
+        largest = -1.0
+        best = start
+        for j in range(start, end):
+            area = abs((selected - average_x) * (y[j] - y[selected]) - (selected - j) * (average_y - y[selected]))
+            if area > largest:
+                largest = area
+                best = j
+        out[i + 1] = best
+        selected = best
+    return out
+
+@lru_cache(maxsize=None)
+def make_rsi(window):
+    """RSI kernel compiled for one fixed window"""
+    @njit(cache=True)
+    def rsi(close):
+        return rsi_kernel(close, window)
+    return rsi
+
+@lru_cache(maxsize=None)
+def make_macd(fast, slow, signal):
+    """MACD kernel compiled for one fixed set of spans"""
+    @njit(cache=True)
+    def macd(close):
+        return macd_kernel(close, fast, slow, signal)
+    return macd
+
+@lru_cache(maxsize=None)
+def make_bbands(window, deviations):
+    """Bollinger Bands kernel compiled for one fixed window and width"""
+    @njit(cache=True)
+    def bbands(close):
+        return bbands_kernel(close, window, deviations)
+    return bbands
+
+@lru_cache(maxsize=None)
+def make_atr(window):
+    """ATR kernel compiled for one fixed window"""
+    @njit(cache=True)
+    def atr(high, low, close):
+        return atr_kernel(high, low, close, window)
+    return atr
+
+@lru_cache(maxsize=None)
+def make_returns_volatility(window):
+    """Returns and rolling volatility kernel compiled for one fixed window"""
+    @njit(cache=True)
+    def returns_volatility(close):
+        return returns_volatility_kernel(close, window)
+    return returns_volatility
@@ -1,26 +1,352 @@
 import os
-import json
-import requests
+import io
+import re
+import copy
+import logging
+import pickle
+import hashlib
+import time
+import asyncio
+import aiohttp
+import orjson
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import yfinance as yf
-import pandas_ta as ta
+from datetime import datetime
 from dotenv import load_dotenv
-import plotly.graph_objects as go
-from sklearn.preprocessing import MinMaxScaler
+from disk_cache import DiskCache, CACHE_DIR
+from data_collector import RequestQueue
+from indicator_kernels import (
+    fill_ohlcv_kernel, lttb_kernel, make_rsi, make_macd, make_bbands, make_atr, make_returns_volatility
+)
+
+# Read the .env file once at import
+load_dotenv()
+
+# Milestones log at INFO; request/response chatter at DEBUG
+logger = logging.getLogger(__name__)
+
+# Validated AI analyses are kept on disk for an hour, keyed on the market snapshot they describe
+PATTERN_CACHE_PATH = os.path.join(CACHE_DIR, 'pattern_analyses.sqlite')
+PATTERN_CACHE_TTL = 3600
+
+# Latest-bar values that identify a snapshot (with the 20/50 SMAs and volume ratio), rounded
+# so re-runs and bars whose indicators barely moved share the stored answer
+SNAPSHOT_COLUMNS = ['Close', 'RSI', 'MACD_12_26_9', 'BBU_20_2.0', 'BBM_20_2.0', 'BBL_20_2.0', 'ATR', 'Volatility']
+SNAPSHOT_SIG_FIGS = 3
+
+# Downloaded price history is reused until its bar interval is likely to have a new bar
+PRICE_CACHE_PATH = os.path.join(CACHE_DIR, 'prices.sqlite')
+PRICE_CACHE_TTLS = {'1m': 60, '5m': 300, '15m': 900, '1h': 1800, '1d': 3600, '1wk': 86400}
+DEFAULT_PRICE_CACHE_TTL = 300
+
+# Analysis calls from overlapping runs can share the pool, so allow a few connections to OpenRouter
+PATTERN_CONCURRENCY = 5
+
+# Chat completions endpoint for every analysis request
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+# A hung connection fails fast: 3s to connect, and at most 20s of silence while streaming
+PATTERN_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=10, sock_connect=3.05, sock_read=20)
+
+# After this many failed calls in a row, skip OpenRouter for the cooldown and use the fallbacks
+BREAKER_FAIL_MAX = 5
+BREAKER_RESET_TIMEOUT = 30
+
+# Classification-style sections go to a small fast model; the numeric forecasts stay on the 70B
+FAST_MODEL = "meta-llama/llama-3.1-8b-instruct"
+STRONG_MODEL = "deepseek/deepseek-r1-distill-llama-70b"
+
+# System message for every analysis request; the requested sections' answer rules are appended
+SYSTEM_PROMPT = "You are a market analysis AI. Respond only with valid JSON objects, no additional text or explanations."
+
+# Sections the combined analysis can ask for: the fields each answer must contain, its JSON
+# shape in the prompt, the answer rules for the system message, its share of max_tokens and
+# the model that answers it. The fast model's budgets are a verbose answer plus ~10%; the 70B's
+# stay roomier because its reasoning tokens count against them too.
+COMBINED_SECTIONS = {
+    'patterns': {
+        'fields': ['patterns', 'quality_score', 'completion', 'reliability'],
+        'schema': """{
+    "patterns": ["string"],
+    "quality_score": number,
+    "completion": number,
+    "reliability": "string",
+    "price_targets": [number],
+    "key_levels": [number]
+}""",
+        'rules': "",
+        'max_tokens': 130,
+        'model': FAST_MODEL
+    },
+    'market_regime': {
+        'fields': ['regime', 'confidence', 'characteristics', 'trend_strength', 'volatility_regime'],
+        'schema': """{
+    "regime": "string",
+    "confidence": number,
+    "characteristics": ["string"],
+    "trend_strength": number,
+    "volatility_regime": "string"
+}""",
+        'rules': "For regime, use one of: ['Trending Up', 'Trending Down', 'Ranging', 'Accumulation', 'Distribution']. For volatility_regime use one of: ['Low', 'Moderate', 'High'].",
+        'max_tokens': 110,
+        'model': FAST_MODEL
+    },
+    'price_prediction': {
+        'fields': ['price_target', 'confidence', 'timeframe', 'key_factors', 'risk_factors', 'support_level', 'resistance_level'],
+        'schema': """{
+    "price_target": number,
+    "confidence": number,
+    "timeframe": "string",
+    "key_factors": ["string"],
+    "risk_factors": ["string"],
+    "support_level": number,
+    "resistance_level": number
+}""",
+        'rules': "For timeframe use one of: ['Short-term (1-3 days)', 'Medium-term (1-2 weeks)', 'Long-term (1+ month)']. Price targets should be within ±15% of current price.",
+        'max_tokens': 250,
+        'model': STRONG_MODEL
+    },
+    'support_resistance': {
+        'fields': ['support_levels', 'resistance_levels'],
+        'schema': """{
+    "support_levels": [
+        {"price": number, "strength": number, "volume_confirmation": "string"}
+    ],
+    "resistance_levels": [
+        {"price": number, "strength": number, "volume_confirmation": "string"}
+    ]
+}""",
+        'rules': "",
+        'max_tokens': 200,
+        'model': STRONG_MODEL
+    },
+    'sentiment': {
+        'fields': ['overall_sentiment', 'sentiment_score', 'momentum_signals', 'reversal_signals',
+                   'volume_analysis', 'strength_indicators', 'weakness_indicators', 'market_psychology'],
+        'schema': """{
+    "overall_sentiment": "string",
+    "sentiment_score": number,
+    "momentum_signals": ["string"],
+    "reversal_signals": ["string"],
+    "volume_analysis": "string",
+    "strength_indicators": ["string"],
+    "weakness_indicators": ["string"],
+    "market_psychology": "string"
+}""",
+        'rules': "For overall_sentiment use one of: ['Strongly Bullish', 'Moderately Bullish', 'Neutral', 'Moderately Bearish', 'Strongly Bearish']. Sentiment score should be from -100 to 100.",
+        'max_tokens': 250,
+        'model': FAST_MODEL
+    },
+    'market_context': {
+        'fields': ['market_phase', 'dominant_traders', 'key_levels', 'volume_profile',
+                   'volatility_state', 'potential_scenarios', 'risk_reward_ratio', 'recommended_position_size'],
+        'schema': """{
+    "market_phase": "string",
+    "dominant_traders": "string",
+    "key_levels": {
+        "immediate_support": number,
+        "immediate_resistance": number,
+        "major_support": number,
+        "major_resistance": number
+    },
+    "volume_profile": "string",
+    "volatility_state": "string",
+    "potential_scenarios": [
+        {"scenario": "string", "probability": number, "key_triggers": ["string"]}
+    ],
+    "risk_reward_ratio": number,
+    "recommended_position_size": "string"
+}""",
+        'rules': "For market_phase use one of: ['Accumulation', 'Mark Up', 'Distribution', 'Mark Down', 'Re-accumulation']. For dominant_traders use one of: ['Institutional', 'Retail', 'Mixed']. Scenario probabilities should sum to 100.",
+        'max_tokens': 350,
+        'model': STRONG_MODEL
+    }
+}
+
+def compile_check(example):
+    """
+    A check that a parsed value has the shape of a schema example: strings and numbers by
+    type (bools are not numbers), every list element like the example's first element, and
+    dicts with all of the example's fields, each checked the same way.
+    """
+    if isinstance(example, str):
+        return lambda value: isinstance(value, str)
+    if isinstance(example, (int, float)):
+        return lambda value: isinstance(value, (int, float)) and not isinstance(value, bool)
+    if isinstance(example, list):
+        item = compile_check(example[0])
+        return lambda value: isinstance(value, list) and all(item(element) for element in value)
+    fields = [(field, compile_check(value)) for field, value in example.items()]
+    names = frozenset(example)
+    return lambda value: (
+        isinstance(value, dict)
+        and value.keys() >= names
+        and all(check(value[field]) for field, check in fields)
+    )
+
+def compile_validator(schema, required):
+    """
+    Turn a section's prompt schema into a check on a parsed answer: the required fields are
+    present and every schema field it has matches the schema's shape, nested values included.
+    """
+    example = orjson.loads(schema.replace('number', '0'))
+    checks = [(field, compile_check(value)) for field, value in example.items()]
+    required = frozenset(required)
+    
+    def validate(value):
+        return (
+            isinstance(value, dict)
+            and value.keys() >= required
+            and all(check(value[field]) for field, check in checks if field in value)
+        )
+    return validate
+
+# Compiled once here rather than per response
+SECTION_VALIDATORS = {
+    section: compile_validator(spec['schema'], spec['fields'])
+    for section, spec in COMBINED_SECTIONS.items()
+}
+
+# The sections detect_patterns and analyze each get from their one combined request
+DETECT_SECTIONS = ('patterns', 'market_regime', 'price_prediction', 'support_resistance')
+ANALYZE_SECTIONS = ('patterns', 'market_regime', 'price_prediction', 'sentiment', 'market_context')
+
+# What detect_patterns reports for a section the AI did not return (copied before use)
+DEFAULT_ANALYSES = {
+    'patterns': {"patterns": [], "quality_score": "N/A", "completion": "N/A"},
+    'market_regime': {"regime": "Unknown", "confidence": "N/A", "characteristics": []},
+    'price_prediction': {"price_target": "N/A", "confidence": "N/A", "key_factors": [], "risk_factors": []},
+    'support_resistance': {"support_levels": [], "resistance_levels": []}
+}
+
+# Price columns, in the order fill_ohlcv_kernel expects
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Longer histories are downsampled to this many candles before plotting
+MAX_PLOT_POINTS = 2000
+
+# A markdown code fence (```json or ```) around an answer, with the whitespace next to it
+CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+# One line of the price-action block in the analysis prompts
+PRICE_ACTION_LINE = "Date %s: O:%.2f H:%.2f L:%.2f C:%.2f"
+
+def format_price_action(price_data):
+    """Render OHLC rows as prompt lines with a single bulk % format instead of a per-row loop"""
+    values = np.column_stack([
+        price_data.index.map(str).to_numpy(dtype=object),
+        price_data[['Open', 'High', 'Low', 'Close']].to_numpy(dtype=object)
+    ])
+    return "\n".join([PRICE_ACTION_LINE] * len(price_data)) % tuple(values.ravel())
+
+def market_snapshot(df):
+    """
+    The derived values the analysis prompts use, computed once per request from the last few
+    rows instead of rolling over the whole history for a single value. SMAs the data is too
+    short for are NaN.
+    """
+    # Plain arrays: the slices below are a few elements, where pandas indexing would dominate
+    close = df['Close'].to_numpy(dtype=np.float64)
+    volume = df['Volume'].to_numpy(dtype=np.float64)
+    upper, middle, lower = (df[column].to_numpy(dtype=np.float64)[-1] for column in ['BBU_20_2.0', 'BBM_20_2.0', 'BBL_20_2.0'])
+    # Zero volume (FX pairs, filled gaps) gives inf/NaN like pandas did, without the warnings
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'sma_20': close[-20:].mean() if len(close) >= 20 else np.nan,
+            'sma_50': close[-50:].mean() if len(close) >= 50 else np.nan,
+            # Mean of the last 5 bar-to-bar changes
+            'price_change': (np.diff(close[-6:]) / close[-6:-1]).mean(),
+            'volume_change': (np.diff(volume[-6:]) / volume[-6:-1]).mean(),
+            'rsi_trend': np.diff(df['RSI'].to_numpy(dtype=np.float64)[-4:]).mean(),
+            'macd_trend': np.diff(df['MACD_12_26_9'].to_numpy(dtype=np.float64)[-4:]).mean(),
+            'volatility_trend': np.diff(df['Volatility'].to_numpy(dtype=np.float64)[-6:]).mean(),
+            'volume_ratio': volume[-1] / volume[-20:].mean(),
+            'bb_width': (upper - lower) / middle
+        }
+
+class CompletionQueue(RequestQueue):
+    """Request queue for the analysis calls: a few quick retries of rate limits, server errors and dropped connections"""
+    BACKOFF_BASE = 0.3
+    MAX_RETRIES = 3
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose circuit breaker is open"""
+
+class CircuitBreaker:
+    """Stop calling a failing service for `reset_timeout` seconds once `fail_max` calls in a row have failed"""
+
+    def __init__(self, fail_max=BREAKER_FAIL_MAX, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    def is_open(self):
+        """True while calls should be skipped"""
+        if self.opened_at is None:
+            return False
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return True
+        # Cooldown over: let calls through again, but one more failure reopens the circuit
+        self.opened_at = None
+        self.failures = self.fail_max - 1
+        return False
+
+    def record_success(self):
+        """Reset the failure count after a call that worked"""
+        self.failures = 0
+
+    def record_failure(self):
+        """Count a failed call, opening the circuit once there have been fail_max in a row"""
+        self.failures += 1
+        if self.failures >= self.fail_max and self.opened_at is None:
+            logger.warning("⚠️ %s failures in a row, pausing API calls for %ss", self.failures, self.reset_timeout)
+            self.opened_at = time.monotonic()
+
+class JsonObjectScanner:
+    """Follow brace depth across streamed text to tell when the first JSON object has closed"""
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text):
+        """Scan the next piece of text; the offset just past the object's closing brace, or None"""
+        for position, char in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '{':
+                self.depth += 1
+                self.started = True
+            elif not self.started:
+                # Anything before the object, like a ```json fence, is skipped
+                continue
+            elif char == '"':
+                self.in_string = True
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    return position + 1
+        return None
 
 class PatternDetector:
     def __init__(self):
-        print("\n=== Initializing Pattern Detector ===")
-        load_dotenv()
+        logger.info("=== Initializing Pattern Detector ===")
         self.api_key = os.getenv('OPENROUTER_API_KEY')
         
         if not self.api_key:
-            print("❌ Error: OpenRouter API key not found!")
+            logger.error("❌ Error: OpenRouter API key not found!")
             raise ValueError("OpenRouter API key not found in environment variables")
         else:
-            print("✅ API Key loaded successfully")
+            logger.info("✅ API Key loaded successfully")
             
         self.headers = {
             'Authorization': f'Bearer {self.api_key}',
@@ -28,7 +354,27 @@ class PatternDetector:
             'HTTP-Referer': 'http://localhost:8501',
             'X-Title': 'Technical Analysis Pattern Detector'
         }
-        print("✅ Headers configured")
+        # Async keep-alive session, created on first use so it binds to the running event loop
+        self.aio_session = None
+        self.request_queue = CompletionQueue(concurrency=PATTERN_CONCURRENCY, delay_range=None)
+        self.breaker = CircuitBreaker()
+        logger.info("✅ Headers configured")
+        
+        try:
+            self.cache = DiskCache(PATTERN_CACHE_PATH, ttl=PATTERN_CACHE_TTL)
+        except Exception as e:
+            logger.warning("⚠️ Analysis cache unavailable: %s", e)
+            self.cache = None
+        
+        try:
+            # DataFrames are pickled; the file is local to this machine. Reads pass their interval's
+            # TTL, so the store's own TTL only purges frames too old for any interval
+            self.price_cache = DiskCache(
+                PRICE_CACHE_PATH, ttl=max(PRICE_CACHE_TTLS.values()), dumps=pickle.dumps, loads=pickle.loads
+            )
+        except Exception as e:
+            logger.warning("⚠️ Price data cache unavailable: %s", e)
+            self.price_cache = None
         
         # Initialize technical indicators
         self.indicators = {
@@ -37,307 +383,450 @@ class PatternDetector:
             'BB': {'timeperiod': 20, 'nbdevup': 2, 'nbdevdn': 2},
             'ATR': {'timeperiod': 14}
         }
-        print("✅ Technical indicators initialized")
-        print("=== Initialization Complete ===\n")
+        # Kernels compiled with these windows baked in as constants (shared by every detector)
+        macd = self.indicators['MACD']
+        self.kernels = {
+            'RSI': make_rsi(self.indicators['RSI']['timeperiod']),
+            'MACD': make_macd(macd['fastperiod'], macd['slowperiod'], macd['signalperiod']),
+            'BB': make_bbands(self.indicators['BB']['timeperiod'], float(self.indicators['BB']['nbdevup'])),
+            'ATR': make_atr(self.indicators['ATR']['timeperiod']),
+            'Volatility': make_returns_volatility(5)
+        }
+        logger.info("✅ Technical indicators initialized")
+        logger.info("=== Initialization Complete ===")
 
     def fetch_data(self, symbol, interval='1d', period='6mo'):
         """Fetch historical price data"""
-        print(f"\n=== Fetching Data for {symbol} ===")
-        print(f"Timeframe: {interval}, Period: {period}")
+        logger.info("=== Fetching Data for %s ===", symbol)
+        logger.debug("Timeframe: %s, Period: %s", interval, period)
+        key = self._price_cache_key(symbol, interval, period)
+        if self.price_cache is not None:
+            try:
+                cached = self.price_cache.get(key, ttl=PRICE_CACHE_TTLS.get(interval, DEFAULT_PRICE_CACHE_TTL))
+                if cached is not None:
+                    logger.info("✅ Using cached data: %s periods", len(cached))
+                    return cached
+            except Exception as e:
+                logger.warning("⚠️ Price data cache read failed: %s", e)
+        
         try:
+            # Imported here so workers that never download prices skip its import cost
+            import yfinance as yf
             ticker = yf.Ticker(symbol)
             df = ticker.history(period=period, interval=interval)
-            print(f"✅ Data fetched successfully: {len(df)} periods")
-            return df
+            logger.info("✅ Data fetched successfully: %s periods", len(df))
         except Exception as e:
-            print(f"❌ Error fetching data: {str(e)}")
+            logger.error("❌ Error fetching data: %s", e)
             return None
+        
+        if self.price_cache is not None and not df.empty:
+            try:
+                self.price_cache.set(key, df)
+            except Exception as e:
+                logger.warning("⚠️ Price data cache write failed: %s", e)
+        return df
+
+    def invalidate(self, symbol, interval='1d', period='6mo'):
+        """Drop cached price data so the next fetch_data call downloads it again"""
+        if self.price_cache is not None:
+            self.price_cache.delete(self._price_cache_key(symbol, interval, period))
+
+    @staticmethod
+    def _price_cache_key(symbol, interval, period):
+        return f"{symbol.upper()}|{interval}|{period}"
 
     def add_technical_indicators(self, df):
         """Add technical indicators to the dataframe"""
         try:
-            # Create a copy of the dataframe
-            df = df.copy()
-            
-            # Fill NaN values in price data first
-            df['Close'] = df['Close'].ffill()
-            df['High'] = df['High'].fillna(df['Close'])
-            df['Low'] = df['Low'].fillna(df['Close'])
-            df['Open'] = df['Open'].fillna(df['Close'])
-            df['Volume'] = df['Volume'].fillna(0)
-            
-            print("Initial columns:", df.columns.tolist())
-            
-            # Add RSI
-            from ta.momentum import RSIIndicator
-            rsi = RSIIndicator(close=df['Close'], window=self.indicators['RSI']['timeperiod'])
-            df['RSI'] = rsi.rsi()
-            print("After RSI:", df.columns.tolist())
-            
-            # Add MACD
-            from ta.trend import MACD
-            macd = MACD(close=df['Close'],
-                       window_slow=self.indicators['MACD']['slowperiod'],
-                       window_fast=self.indicators['MACD']['fastperiod'],
-                       window_sign=self.indicators['MACD']['signalperiod'])
-            df['MACD_12_26_9'] = macd.macd()
-            df['MACDs_12_26_9'] = macd.macd_signal()
-            df['MACDh_12_26_9'] = macd.macd_diff()
-            print("After MACD:", df.columns.tolist())
-            
-            # Add Bollinger Bands
-            from ta.volatility import BollingerBands
-            bb = BollingerBands(close=df['Close'],
-                               window=self.indicators['BB']['timeperiod'],
-                               window_dev=self.indicators['BB']['nbdevup'])
-            df['BBU_20_2.0'] = bb.bollinger_hband()
-            df['BBM_20_2.0'] = bb.bollinger_mavg()
-            df['BBL_20_2.0'] = bb.bollinger_lband()
-            print("After BB:", df.columns.tolist())
-            
-            # Add ATR
-            from ta.volatility import AverageTrueRange
-            atr = AverageTrueRange(high=df['High'], low=df['Low'], close=df['Close'],
-                                  window=self.indicators['ATR']['timeperiod'])
-            df['ATR'] = atr.average_true_range()
-            print("After ATR:", df.columns.tolist())
+            logger.debug("Initial columns: %s", df.columns.tolist())
+            
+            # Fill price gaps in one pass over a fresh array; the caller's frame is never modified.
+            # Column-major layout makes each price column a contiguous view the kernels read without copying
+            ohlcv = fill_ohlcv_kernel(np.array(df[OHLCV_COLUMNS].to_numpy(dtype=np.float64), order='F'))
+            open_, high, low, close, volume = (ohlcv[:, i] for i in range(5))
+            
+            # Compute every indicator from the raw float64 arrays in single-pass kernels
+            macd_line, macd_signal, macd_hist = self.kernels['MACD'](close)
+            bb_upper, bb_middle, bb_lower = self.kernels['BB'](close)
+            # Where Close sits inside the bands (0 = lower, 1 = upper); undefined when the bands touch
+            bb_band = bb_upper - bb_lower
+            bb_position = np.divide(close - bb_lower, bb_band, out=np.full_like(close, np.nan), where=bb_band != 0)
+            
+            df = df.assign(**{
+                'Open': open_,
+                'High': high,
+                'Low': low,
+                'Close': close,
+                # Integer volumes have no gaps to fill, so keep their dtype
+                'Volume': volume.astype(df['Volume'].dtype, copy=False),
+                'RSI': self.kernels['RSI'](close),
+                'MACD_12_26_9': macd_line,
+                'MACDs_12_26_9': macd_signal,
+                'MACDh_12_26_9': macd_hist,
+                'BBU_20_2.0': bb_upper,
+                'BBM_20_2.0': bb_middle,
+                'BBL_20_2.0': bb_lower,
+                'BB_Position': bb_position,
+                'ATR': self.kernels['ATR'](high, low, close)
+            })
+            logger.debug("After indicators: %s", df.columns.tolist())
             
-            # Calculate Returns and Volatility
-            df['Returns'] = df['Close'].pct_change()
-            df['Volatility'] = df['Returns'].rolling(5).std()
+            # Calculate Returns and Volatility in one pass over Close
+            df['Returns'], df['Volatility'] = self.kernels['Volatility'](close)
             
             # Fill any remaining NaN values
             df = df.ffill().bfill()
             
-            print("Final columns:", df.columns.tolist())
+            logger.debug("Final columns: %s", df.columns.tolist())
             return df
         except Exception as e:
-            print(f"Error adding indicators: {str(e)}")
-            print("DataFrame head:", df.head())
-            print("DataFrame info:", df.info())
+            logger.error("Error adding indicators: %s", e)
+            # df.info() builds its whole report up front, so only do it when debugging
+            if logger.isEnabledFor(logging.DEBUG):
+                buffer = io.StringIO()
+                df.info(buf=buffer)
+                logger.debug("DataFrame head:\n%s", df.head())
+                logger.debug("DataFrame info:\n%s", buffer.getvalue())
             return df
 
+    async def _get_aio_session(self):
+        """Return the shared async HTTP session, creating it on first use"""
+        if self.aio_session is None or self.aio_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=PATTERN_CONCURRENCY,
+                limit_per_host=PATTERN_CONCURRENCY,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            self.aio_session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=PATTERN_TIMEOUT
+            )
+        return self.aio_session
+
+    async def close(self):
+        """Close the async HTTP session"""
+        if self.aio_session is not None and not self.aio_session.closed:
+            await self.aio_session.close()
+        self.aio_session = None
+
+    def _run(self, coro):
+        """Run a coroutine from synchronous code, closing the session with its event loop"""
+        async def run():
+            try:
+                return await coro
+            finally:
+                await self.close()
+        return asyncio.run(run())
+
+    async def _post_completion(self, body):
+        """
+        POST a chat completion request and return (status, raw response body), retrying transient failures with backoff.
+        Raises CircuitOpenError without calling the API while the circuit breaker is open, so callers fall back at once.
+        """
+        if self.breaker.is_open():
+            raise CircuitOpenError("OpenRouter is failing, skipping the request for now")
+        try:
+            status, raw = await self.request_queue.add(lambda: self._stream_completion(body))
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        # Server-side errors count against the breaker; client errors are our own fault
+        if status >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return status, raw
+
+    async def _stream_completion(self, body):
+        """
+        Make one streamed chat completion request.
+        Text after the answer's JSON object closes is dropped, but the stream is still read to
+        [DONE] so the connection goes back to the keep-alive pool. The answer is handed back in
+        the shape of a non-streamed response so callers parse it the same way.
+        """
+        session = await self._get_aio_session()
+        async with session.post(OPENROUTER_URL, data=body) as response:
+            if response.status in CompletionQueue.RETRY_STATUSES:
+                # Raised so the queue backs off (honouring Retry-After) and tries again
+                response.raise_for_status()
+            if response.status != 200:
+                return response.status, await response.read()
+            
+            parts = []
+            scanner = JsonObjectScanner()
+            complete = False
+            async for line in response.content:
+                line = line.strip()
+                # Blank separators and SSE comments (OpenRouter's keep-alives) carry no data
+                if not line.startswith(b'data:'):
+                    continue
+                data = line[5:].strip()
+                if data == b'[DONE]':
+                    break
+                chunk = orjson.loads(data)
+                if 'error' in chunk:
+                    # Errors after the stream has started arrive as a data event
+                    return 500, data
+                # After the JSON closes only the finish and usage events are left to drain
+                if complete or not chunk.get('choices'):
+                    continue
+                text = chunk['choices'][0].get('delta', {}).get('content') or ''
+                end = scanner.feed(text)
+                if end is None:
+                    parts.append(text)
+                    continue
+                parts.append(text[:end])
+                complete = True
+                logger.debug("JSON object complete, ignoring the rest of the stream")
+        
+        return 200, orjson.dumps({"choices": [{"message": {"content": "".join(parts)}}]})
+
     def detect_patterns(self, df, lookback=30):
         """Detect patterns in the price action using DeepSeek AI"""
-        print("\n=== Starting Pattern Detection ===")
+        return self._run(self.detect_patterns_async(df, lookback))
+
+    async def detect_patterns_async(self, df, lookback=30):
+        """Detect patterns with the four AI analyses answered by one request per model"""
+        logger.info("=== Starting Pattern Detection ===")
         try:
             recent_data = df.tail(lookback).copy()
-            print(f"Analyzing last {lookback} periods")
-            
-            print("\n1. Getting Pattern Analysis...")
-            pattern_analysis = self._get_pattern_analysis(recent_data)
-            
-            print("\n2. Getting Market Regime Analysis...")
-            regime_analysis = self._get_market_regime(recent_data)
-            
-            print("\n3. Getting Price Prediction...")
-            price_prediction = self._get_price_prediction(recent_data)
-            
-            print("\n4. Getting Support/Resistance Levels...")
-            support_resistance = self._get_support_resistance(recent_data)
-            
-            print("\nPreparing response...")
-            # Initialize default values for each analysis type
-            default_pattern = json.dumps({
-                "patterns": [],
-                "quality_score": "N/A",
-                "completion": "N/A"
-            })
-            
-            default_regime = json.dumps({
-                "regime": "Unknown",
-                "confidence": "N/A",
-                "characteristics": []
-            })
-            
-            default_prediction = json.dumps({
-                "price_target": "N/A",
-                "confidence": "N/A",
-                "key_factors": [],
-                "risk_factors": []
-            })
+            logger.debug("Analyzing last %s periods", lookback)
             
-            default_sr = json.dumps({
-                "support_levels": [],
-                "resistance_levels": []
-            })
+            logger.debug("Getting combined pattern, regime, prediction and support/resistance analysis...")
+            sections = await self._get_combined_analysis(recent_data, DETECT_SECTIONS)
             
+            logger.debug("Preparing response...")
+            # Sections that came back missing or invalid get their default
             combined_analysis = {
-                'patterns': pattern_analysis if pattern_analysis else default_pattern,
-                'market_regime': regime_analysis if regime_analysis else default_regime,
-                'price_prediction': price_prediction if price_prediction else default_prediction,
-                'support_resistance': support_resistance if support_resistance else default_sr,
-                'timestamp': datetime.now().isoformat()
+                section: sections[section] or copy.deepcopy(default)
+                for section, default in DEFAULT_ANALYSES.items()
             }
+            combined_analysis['timestamp'] = datetime.now().isoformat()
             
-            print("✅ Analysis complete")
+            logger.info("✅ Analysis complete")
             return combined_analysis
             
         except Exception as e:
-            print(f"❌ Error in pattern detection: {str(e)}")
-            return {
-                'patterns': json.dumps({"error": str(e), "patterns": [], "quality_score": "N/A", "completion": "N/A"}),
-                'market_regime': json.dumps({"error": str(e), "regime": "Unknown", "confidence": "N/A", "characteristics": []}),
-                'price_prediction': json.dumps({"error": str(e), "price_target": "N/A", "confidence": "N/A", "key_factors": [], "risk_factors": []}),
-                'support_resistance': json.dumps({"error": str(e), "support_levels": [], "resistance_levels": []}),
-                'timestamp': datetime.now().isoformat()
+            logger.error("❌ Error in pattern detection: %s", e)
+            failed = {
+                section: {"error": str(e), **copy.deepcopy(default)}
+                for section, default in DEFAULT_ANALYSES.items()
             }
+            failed['timestamp'] = datetime.now().isoformat()
+            return failed
 
-    def _get_pattern_analysis(self, df):
-        """Get AI-powered pattern analysis"""
-        print("\nMaking API call for pattern analysis...")
+    async def _get_combined_analysis(self, df, sections=DETECT_SECTIONS):
+        """
+        Get the named COMBINED_SECTIONS analyses with one API call per model, sent together.
+        Returns a dict per section, or None for any section that is missing or invalid.
+        """
+        groups = {}
+        for section in sections:
+            groups.setdefault(COMBINED_SECTIONS[section]['model'], []).append(section)
+        answers = await asyncio.gather(*(
+            self._get_section_group(df, group, model) for model, group in groups.items()
+        ))
+        results = dict.fromkeys(sections)
+        for answer in answers:
+            results.update(answer)
+        return results
+
+    async def _get_section_group(self, df, sections, model):
+        """
+        Get several COMBINED_SECTIONS analyses from one API call to the given model.
+        Returns a dict per section, or None for any section that is missing or invalid.
+        """
+        logger.debug("Making API call to %s for %s...", model, ", ".join(sections))
+        results = dict.fromkeys(sections)
+        specs = {section: COMBINED_SECTIONS[section] for section in sections}
+        last = df.iloc[-1].to_dict()
+        
+        price_str = format_price_action(df.iloc[-5:])
         
-        # Format the price data as a simple string
-        price_data = df[['Open', 'High', 'Low', 'Close']].tail(5)
-        price_str = "\n".join([
-            f"Date {idx}: O:{row['Open']:.2f} H:{row['High']:.2f} L:{row['Low']:.2f} C:{row['Close']:.2f}" 
-            for idx, row in price_data.iterrows()
-        ])
+        current_price = last['Close']
+        snapshot = market_snapshot(df)
+        # Only the moving averages the lookback is long enough to fill
+        sma_lines = "".join(
+            f"\n- {window} SMA: {snapshot[f'sma_{window}']:.2f}"
+            for window in (20, 50) if not np.isnan(snapshot[f'sma_{window}'])
+        )
         
-        current_price = df['Close'].iloc[-1]
+        # Each section's answer shape, nested one level under its name
+        schema = ",\n".join(
+            f'    "{section}": ' + spec['schema'].replace("\n", "\n    ")
+            for section, spec in specs.items()
+        )
+        rules = " ".join(spec['rules'] for spec in specs.values() if spec['rules'])
         
-        prompt = f"""Analyze the following price action and technical indicators to identify chart patterns:
+        # Every number the separate prompts used, listed once
+        prompt = f"""Analyze the following market data:
 
 Price Action (last 5 periods):
 {price_str}
 
+Price Range:
+- High: {df['High'].max():.2f}
+- Low: {df['Low'].min():.2f}
+- Current: {current_price:.2f}
+- Average Volume: {df['Volume'].mean():.2f}{sma_lines}
+
 Technical Indicators:
-- RSI: {df['RSI'].iloc[-1]:.2f}
-- MACD: {df['MACD_12_26_9'].iloc[-1]:.2f}
-- BB Upper: {df['BBU_20_2.0'].iloc[-1]:.2f}
-- BB Lower: {df['BBL_20_2.0'].iloc[-1]:.2f}
+- RSI: {last['RSI']:.2f} (Trend: {snapshot['rsi_trend']:.4f})
+- MACD: {last['MACD_12_26_9']:.2f} (Trend: {snapshot['macd_trend']:.4f})
+- MACD Signal: {last['MACDs_12_26_9']:.2f}
+- BB Upper: {last['BBU_20_2.0']:.2f}
+- BB Lower: {last['BBL_20_2.0']:.2f}
+- BB Width: {snapshot['bb_width']:.4f}
+- BB Position: {last['BB_Position']:.4f}
+- ATR: {last['ATR']:.2f}
+- Volatility: {last['Volatility']:.4f} (Trend: {snapshot['volatility_trend']:.4f})
+- Volume Ratio: {snapshot['volume_ratio']:.2f}x 20-period average
+- 5-period Volume Change: {snapshot['volume_change']:.2%}
+- 5-period Price Change: {snapshot['price_change']:.2%}
 
 Return ONLY a valid JSON object in this exact format:
 {{
-    "patterns": ["string"],
-    "quality_score": number,
-    "completion": number,
-    "reliability": "string",
-    "price_targets": [number],
-    "key_levels": [number]
+{schema}
 }}"""
 
+        body = orjson.dumps({
+            "model": model,
+            "messages": [
+                {"role": "system", "content": f"{SYSTEM_PROMPT} {rules}".rstrip()},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.1,
+            "stream": True,
+            "response_format": {"type": "json_object"},
+            # Room for every section's answer, as much as each got on its own
+            "max_tokens": sum(spec['max_tokens'] for spec in specs.values())
+        })
+        
+        # Requests on a near-identical snapshot reuse the stored answer instead of another API round-trip
+        cache_key = self._snapshot_key(",".join(sections), last, snapshot)
+        cached = self._get_cached_analysis(cache_key)
+        if cached is not None:
+            logger.info("✅ Using cached analysis")
+            return cached
+
         try:
-            print("Sending request to OpenRouter API...")
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=self.headers,
-                json={
-                    "model": "deepseek/deepseek-r1-distill-llama-70b",
-                    "messages": [
-                        {"role": "system", "content": "You are a market analysis AI. Respond only with valid JSON objects, no additional text or explanations."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 200
-                }
-            )
-            
-            print(f"API Response Status: {response.status_code}")
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-                    print("Full API Response:", result)
-                    
-                    if 'choices' in result and len(result['choices']) > 0:
-                        content = result['choices'][0]['message']['content'].strip()
-                        print("Raw Content:", content)
-                        
-                        # Try to clean the content if it has markdown code blocks
-                        if content.startswith("```json"):
-                            content = content.replace("```json", "").replace("```", "").strip()
-                        elif content.startswith("```"):
-                            content = content.replace("```", "").strip()
-                        
-                        json_content = json.loads(content)
-                        required_fields = ['patterns', 'quality_score', 'completion', 'reliability']
-                        if all(field in json_content for field in required_fields):
-                            print("✅ Pattern analysis received and validated")
-                            print(f"Detected patterns: {json_content['patterns']}")
-                            return json.dumps(json_content)
-                        else:
-                            raise ValueError("Missing required fields in JSON response")
-                    else:
-                        raise ValueError("No choices in API response")
-                except Exception as e:
-                    print(f"❌ Error processing API response: {str(e)}")
-                    print("Raw response content:", content if 'content' in locals() else "No content")
-                    return json.dumps({
-                        "patterns": [],
-                        "quality_score": 0,
-                        "completion": 0,
-                        "reliability": "unknown",
-                        "price_targets": [],
-                        "key_levels": []
-                    })
-            else:
-                print(f"❌ API request failed: {response.text}")
-                return json.dumps({
-                    "patterns": [],
-                    "quality_score": 0,
-                    "completion": 0,
-                    "reliability": "unknown",
-                    "price_targets": [],
-                    "key_levels": []
-                })
+            logger.debug("Sending request to OpenRouter API...")
+            status, raw = await self._post_completion(body)
+            
+            logger.debug("API Response Status: %s", status)
+            if status != 200:
+                logger.error("❌ API request failed: %s", raw.decode('utf-8', 'replace'))
+                return results
+            
+            result = orjson.loads(raw)
+            if not result.get('choices'):
+                raise ValueError("No choices in API response")
+            content = result['choices'][0]['message']['content'].strip()
+            logger.debug("Raw Content: %s", content)
+            
+            # Drop any markdown code fence around the JSON; not every provider honours response_format
+            content = CODE_FENCE.sub("", content)
+            
+            json_content = orjson.loads(content)
+            # Keep every section that validates; the rest fall back to defaults
+            for section, spec in specs.items():
+                value = json_content.get(section)
+                if SECTION_VALIDATORS[section](value):
+                    results[section] = value
+                else:
+                    logger.warning("⚠️ Missing or invalid %s section in combined analysis", section)
+            
+            if all(results.values()):
+                logger.info("✅ Combined analysis received and validated")
+                self._set_cached_analysis(cache_key, results)
+            return results
         except Exception as e:
-            print(f"❌ Error in pattern analysis: {str(e)}")
-            return json.dumps({
-                "patterns": [],
-                "quality_score": 0,
-                "completion": 0,
-                "reliability": "unknown",
-                "price_targets": [],
-                "key_levels": []
-            })
+            logger.error("❌ Error in combined analysis: %s", e)
+            logger.debug("Raw response content: %s", content if 'content' in locals() else "No content")
+            return results
+
+    def _snapshot_key(self, name, last, snapshot):
+        """Hash an analysis name and the latest indicator values, to SNAPSHOT_SIG_FIGS, into a cache key"""
+        values = [last[column] for column in SNAPSHOT_COLUMNS]
+        values += [snapshot['sma_20'], snapshot['sma_50'], snapshot['volume_ratio']]
+        snapshot = (name, *(f"{value:.{SNAPSHOT_SIG_FIGS}g}" for value in values))
+        return hashlib.blake2b(repr(snapshot).encode(), digest_size=16).hexdigest()
+
+    def _get_cached_analysis(self, key):
+        """Return a cached analysis dict, or None"""
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            logger.warning("⚠️ Analysis cache read failed: %s", e)
+            return None
+
+    def _set_cached_analysis(self, key, result):
+        """Store a validated analysis dict"""
+        if self.cache is None:
+            return
+        try:
+            self.cache.set(key, result)
+        except Exception as e:
+            logger.warning("⚠️ Analysis cache write failed: %s", e)
 
     def plot_pattern(self, df, pattern_info):
         """Create an interactive plot with pattern annotations"""
-        print("\n=== Generating Plot ===")
+        logger.info("=== Generating Plot ===")
         try:
-            fig = go.Figure()
-            
-            print("Adding candlestick chart...")
-            fig.add_trace(go.Candlestick(
-                x=df.index,
-                open=df['Open'],
-                high=df['High'],
-                low=df['Low'],
-                close=df['Close'],
-                name='Price'
-            ))
-            
-            print("Adding Bollinger Bands...")
-            # Add upper band
-            fig.add_trace(go.Scatter(
-                x=df.index,
-                y=df['BBU_20_2.0'],
-                name='BB Upper',
-                line=dict(color='rgba(250, 250, 250, 0.3)', dash='dash')
-            ))
-            
-            # Add middle band
-            fig.add_trace(go.Scatter(
-                x=df.index,
-                y=df['BBM_20_2.0'],
-                name='BB Middle',
-                line=dict(color='rgba(250, 250, 250, 0.2)')
-            ))
-            
-            # Add lower band
-            fig.add_trace(go.Scatter(
-                x=df.index,
-                y=df['BBL_20_2.0'],
-                name='BB Lower',
-                line=dict(color='rgba(250, 250, 250, 0.3)', dash='dash'),
-                fill='tonexty'
-            ))
+            import plotly.graph_objects as go
+            
+            if len(df) > MAX_PLOT_POINTS:
+                # Keep the rows that preserve the shape of the Close line
+                rows = lttb_kernel(df['Close'].to_numpy(dtype=np.float64), MAX_PLOT_POINTS)
+                logger.debug("Downsampling %s periods to %s for plotting...", len(df), len(rows))
+                df = df.iloc[rows]
+            
+            logger.debug("Adding candlestick chart and Bollinger Bands...")
+            x = df.index
+            fig = go.Figure(data=[
+                go.Candlestick(
+                    x=x,
+                    open=df['Open'].to_numpy(),
+                    high=df['High'].to_numpy(),
+                    low=df['Low'].to_numpy(),
+                    close=df['Close'].to_numpy(),
+                    name='Price'
+                ),
+                go.Scatter(
+                    x=x,
+                    y=df['BBU_20_2.0'].to_numpy(),
+                    name='BB Upper',
+                    line=dict(color='rgba(250, 250, 250, 0.3)', dash='dash')
+                ),
+                go.Scatter(
+                    x=x,
+                    y=df['BBM_20_2.0'].to_numpy(),
+                    name='BB Middle',
+                    line=dict(color='rgba(250, 250, 250, 0.2)')
+                ),
+                go.Scatter(
+                    x=x,
+                    y=df['BBL_20_2.0'].to_numpy(),
+                    name='BB Lower',
+                    line=dict(color='rgba(250, 250, 250, 0.3)', dash='dash'),
+                    fill='tonexty'
+                )
+            ])
             
-            print("Adding support and resistance levels...")
+            logger.debug("Adding support and resistance levels...")
             if pattern_info and 'support_resistance' in pattern_info:
                 try:
-                    sr_data = json.loads(pattern_info['support_resistance'])
-                    print("Support/Resistance data:", sr_data)
+                    # detect_patterns hands over a dict; older callers may still pass the JSON string
+                    sr_data = pattern_info['support_resistance']
+                    if isinstance(sr_data, (str, bytes)):
+                        sr_data = orjson.loads(sr_data)
+                    if not isinstance(sr_data, dict):
+                        raise TypeError(f"expected a dict of levels, got {type(sr_data).__name__}")
+                    logger.debug("Support/Resistance data: %s", sr_data)
                     
                     # Add support levels
                     support_levels = sr_data.get('support_levels', [])
@@ -353,7 +842,7 @@ Return ONLY a valid JSON object in this exact format:
                                         annotation_text=f"Support {price:.2f} (Strength: {strength})"
                                     )
                                 except (ValueError, TypeError) as e:
-                                    print(f"Error adding support level: {e}")
+                                    logger.error("Error adding support level: %s", e)
                     
                     # Add resistance levels
                     resistance_levels = sr_data.get('resistance_levels', [])
@@ -369,11 +858,11 @@ Return ONLY a valid JSON object in this exact format:
                                         annotation_text=f"Resistance {price:.2f} (Strength: {strength})"
                                     )
                                 except (ValueError, TypeError) as e:
-                                    print(f"Error adding resistance level: {e}")
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing support/resistance data: {e}")
+                                    logger.error("Error adding resistance level: %s", e)
+                except (ValueError, TypeError) as e:
+                    logger.error("Error parsing support/resistance data: %s", e)
             
-            print("Updating layout...")
+            logger.debug("Updating layout...")
             fig.update_layout(
                 title='Price Action with Technical Patterns',
                 yaxis_title='Price',
@@ -400,516 +889,58 @@ Return ONLY a valid JSON object in this exact format:
                 )
             )
             
-            print("✅ Plot generated successfully")
+            logger.info("✅ Plot generated successfully")
             return fig
         except Exception as e:
-            print(f"❌ Error generating plot: {str(e)}")
-            print(f"Pattern info type: {type(pattern_info)}")
+            logger.error("❌ Error generating plot: %s", e)
+            logger.debug("Pattern info type: %s", type(pattern_info))
             if pattern_info:
-                print(f"Pattern info content: {pattern_info}")
+                logger.debug("Pattern info content: %s", pattern_info)
             return None
 
-    def _get_market_regime(self, df):
-        """Detect current market regime using AI"""
-        print("\nMaking API call for market regime analysis...")
-        
-        # Calculate additional technical indicators for context
-        last_close = df['Close'].iloc[-1]
-        sma_20 = df['Close'].rolling(window=20).mean().iloc[-1]
-        sma_50 = df['Close'].rolling(window=50).mean().iloc[-1]
-        vol_change = df['Volume'].pct_change().tail(5).mean()
-        price_change = df['Close'].pct_change().tail(5).mean()
-        
-        prompt = f"""Analyze the following market data and return a JSON response describing the market regime:
-
-Technical Data:
-- Current Price: {last_close:.2f}
-- RSI: {df['RSI'].iloc[-1]:.2f}
-- MACD: {df['MACD_12_26_9'].iloc[-1]:.2f}
-- 20 SMA: {sma_20:.2f}
-- 50 SMA: {sma_50:.2f}
-- 5-day Volume Change: {vol_change:.2%}
-- 5-day Price Change: {price_change:.2%}
-
-Return ONLY a valid JSON object in this exact format:
-{{
-    "regime": "string",
-    "confidence": number,
-    "characteristics": ["string"],
-    "trend_strength": number,
-    "volatility_regime": "string"
-}}"""
-
-        try:
-            print("Sending request to OpenRouter API...")
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=self.headers,
-                json={
-                    "model": "deepseek/deepseek-r1-distill-llama-70b",
-                    "messages": [
-                        {"role": "system", "content": "You are a market analysis AI. Respond only with valid JSON objects. For regime, use one of: ['Trending Up', 'Trending Down', 'Ranging', 'Accumulation', 'Distribution']. For volatility_regime use one of: ['Low', 'Moderate', 'High']."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 150
-                }
-            )
-            
-            print(f"API Response Status: {response.status_code}")
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-                    print("Full API Response:", result)
-                    
-                    if 'choices' in result and len(result['choices']) > 0:
-                        content = result['choices'][0]['message']['content'].strip()
-                        print("Raw Content:", content)
-                        
-                        # Try to clean the content if it has markdown code blocks
-                        if content.startswith("```json"):
-                            content = content.replace("```json", "").replace("```", "").strip()
-                        elif content.startswith("```"):
-                            content = content.replace("```", "").strip()
-                        
-                        json_content = json.loads(content)
-                        required_fields = ['regime', 'confidence', 'characteristics', 'trend_strength', 'volatility_regime']
-                        if all(field in json_content for field in required_fields):
-                            print("✅ Market regime analysis received and validated")
-                            print(f"Detected regime: {json_content['regime']} with {json_content['confidence']}% confidence")
-                            return json.dumps(json_content)
-                        else:
-                            raise ValueError("Missing required fields in JSON response")
-                    else:
-                        raise ValueError("No choices in API response")
-                except Exception as e:
-                    print(f"❌ Error processing API response: {str(e)}")
-                    print("Raw response content:", content if 'content' in locals() else "No content")
-                    return json.dumps({
-                        "regime": "Unknown",
-                        "confidence": 0,
-                        "characteristics": ["Analysis failed - invalid response format"],
-                        "trend_strength": 0,
-                        "volatility_regime": "Unknown"
-                    })
-            else:
-                print(f"❌ API request failed: {response.text}")
-                return json.dumps({
-                    "regime": "Unknown",
-                    "confidence": 0,
-                    "characteristics": ["Analysis failed - API error"],
-                    "trend_strength": 0,
-                    "volatility_regime": "Unknown"
-                })
-        except Exception as e:
-            print(f"❌ Error in market regime analysis: {str(e)}")
-            return json.dumps({
-                "regime": "Unknown",
-                "confidence": 0,
-                "characteristics": ["Analysis failed - system error"],
-                "trend_strength": 0,
-                "volatility_regime": "Unknown"
-            })
-
-    def _get_price_prediction(self, df):
-        """Get AI-powered price predictions"""
-        print("\nMaking API call for price prediction...")
-        
-        current_price = df['Close'].iloc[-1]
-        bb_width = (df['BBU_20_2.0'] - df['BBL_20_2.0']) / df['BBM_20_2.0']
-        bb_position = (current_price - df['BBL_20_2.0']) / (df['BBU_20_2.0'] - df['BBL_20_2.0'])
-        
-        prompt = f"""Analyze the following market data and return a JSON response with price predictions:
-
-Technical Data:
-- Current Price: {current_price:.2f}
-- RSI: {df['RSI'].iloc[-1]:.2f}
-- MACD: {df['MACD_12_26_9'].iloc[-1]:.2f}
-- MACD Signal: {df['MACDs_12_26_9'].iloc[-1]:.2f}
-- BB Width: {bb_width.iloc[-1]:.4f}
-- BB Position: {bb_position.iloc[-1]:.4f}
-- ATR: {df['ATR'].iloc[-1]:.2f}
-- Volatility: {df['Volatility'].iloc[-1]:.4f}
-
-Return ONLY a valid JSON object in this exact format:
-{{
-    "price_target": number,
-    "confidence": number,
-    "timeframe": "string",
-    "key_factors": ["string"],
-    "risk_factors": ["string"],
-    "support_level": number,
-    "resistance_level": number
-}}"""
-
-        try:
-            print("Sending request to OpenRouter API...")
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=self.headers,
-                json={
-                    "model": "deepseek/deepseek-r1-distill-llama-70b",
-                    "messages": [
-                        {"role": "system", "content": "You are a market analysis AI. Respond only with valid JSON objects. For timeframe use one of: ['Short-term (1-3 days)', 'Medium-term (1-2 weeks)', 'Long-term (1+ month)']. Price targets should be within ±15% of current price."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 250
-                }
-            )
-            
-            print(f"API Response Status: {response.status_code}")
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-                    print("Full API Response:", result)
-                    
-                    if 'choices' in result and len(result['choices']) > 0:
-                        content = result['choices'][0]['message']['content'].strip()
-                        print("Raw Content:", content)
-                        
-                        # Try to clean the content if it has markdown code blocks
-                        if content.startswith("```json"):
-                            content = content.replace("```json", "").replace("```", "").strip()
-                        elif content.startswith("```"):
-                            content = content.replace("```", "").strip()
-                        
-                        json_content = json.loads(content)
-                        required_fields = ['price_target', 'confidence', 'timeframe', 'key_factors', 'risk_factors', 'support_level', 'resistance_level']
-                        if all(field in json_content for field in required_fields):
-                            print("✅ Price prediction received and validated")
-                            print(f"Price target: {json_content['price_target']} ({json_content['timeframe']}) with {json_content['confidence']}% confidence")
-                            return json.dumps(json_content)
-                        else:
-                            raise ValueError("Missing required fields in JSON response")
-                    else:
-                        raise ValueError("No choices in API response")
-                except Exception as e:
-                    print(f"❌ Error processing API response: {str(e)}")
-                    print("Raw response content:", content if 'content' in locals() else "No content")
-                    return json.dumps({
-                        "price_target": current_price,
-                        "confidence": 0,
-                        "timeframe": "Unknown",
-                        "key_factors": ["Analysis failed - invalid response format"],
-                        "risk_factors": ["Unable to determine risks"],
-                        "support_level": current_price * 0.95,
-                        "resistance_level": current_price * 1.05
-                    })
-            else:
-                print(f"❌ API request failed: {response.text}")
-                return json.dumps({
-                    "price_target": current_price,
-                    "confidence": 0,
-                    "timeframe": "Unknown",
-                    "key_factors": ["Analysis failed - API error"],
-                    "risk_factors": ["Unable to determine risks"],
-                    "support_level": current_price * 0.95,
-                    "resistance_level": current_price * 1.05
-                })
-        except Exception as e:
-            print(f"❌ Error in price prediction: {str(e)}")
-            return json.dumps({
-                "price_target": current_price,
-                "confidence": 0,
-                "timeframe": "Unknown",
-                "key_factors": ["Analysis failed - system error"],
-                "risk_factors": ["Unable to determine risks"],
-                "support_level": current_price * 0.95,
-                "resistance_level": current_price * 1.05
-            })
-
-    def _get_sentiment_analysis(self, df):
-        """Analyze market sentiment using price action and indicators"""
-        print("\nMaking API call for sentiment analysis...")
-        
-        # Calculate additional indicators
-        price_momentum = df['Close'].pct_change().rolling(window=5).mean().iloc[-1]
-        volume_momentum = df['Volume'].pct_change().rolling(window=5).mean().iloc[-1]
-        rsi_trend = df['RSI'].diff().rolling(window=3).mean().iloc[-1]
-        macd_trend = df['MACD_12_26_9'].diff().rolling(window=3).mean().iloc[-1]
-        
-        prompt = f"""Analyze the following market data and provide a detailed sentiment analysis:
-
-Technical Indicators:
-- RSI: {df['RSI'].iloc[-1]:.2f} (Trend: {rsi_trend:.4f})
-- MACD: {df['MACD_12_26_9'].iloc[-1]:.2f} (Trend: {macd_trend:.4f})
-- Price Momentum: {price_momentum:.2%}
-- Volume Momentum: {volume_momentum:.2%}
-- Bollinger Position: {((df['Close'].iloc[-1] - df['BBL_20_2.0'].iloc[-1]) / (df['BBU_20_2.0'].iloc[-1] - df['BBL_20_2.0'].iloc[-1])):.2f}
-
-Return ONLY a valid JSON object in this exact format:
-{{
-    "overall_sentiment": "string",
-    "sentiment_score": number,
-    "momentum_signals": ["string"],
-    "reversal_signals": ["string"],
-    "volume_analysis": "string",
-    "strength_indicators": ["string"],
-    "weakness_indicators": ["string"],
-    "market_psychology": "string"
-}}"""
-
-        try:
-            print("Sending request to OpenRouter API...")
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=self.headers,
-                json={
-                    "model": "deepseek/deepseek-r1-distill-llama-70b",
-                    "messages": [
-                        {"role": "system", "content": "You are a market sentiment analysis AI. For overall_sentiment use one of: ['Strongly Bullish', 'Moderately Bullish', 'Neutral', 'Moderately Bearish', 'Strongly Bearish']. Sentiment score should be from -100 to 100."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 250
-                }
-            )
-            
-            print(f"API Response Status: {response.status_code}")
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-                    print("Full API Response:", result)
-                    
-                    if 'choices' in result and len(result['choices']) > 0:
-                        content = result['choices'][0]['message']['content'].strip()
-                        print("Raw Content:", content)
-                        
-                        if content.startswith("```json"):
-                            content = content.replace("```json", "").replace("```", "").strip()
-                        elif content.startswith("```"):
-                            content = content.replace("```", "").strip()
-                        
-                        json_content = json.loads(content)
-                        required_fields = ['overall_sentiment', 'sentiment_score', 'momentum_signals', 'reversal_signals', 
-                                        'volume_analysis', 'strength_indicators', 'weakness_indicators', 'market_psychology']
-                        if all(field in json_content for field in required_fields):
-                            print("✅ Sentiment analysis received and validated")
-                            print(f"Overall Sentiment: {json_content['overall_sentiment']} (Score: {json_content['sentiment_score']})")
-                            return json.dumps(json_content)
-                        else:
-                            raise ValueError("Missing required fields in JSON response")
-                    else:
-                        raise ValueError("No choices in API response")
-                except Exception as e:
-                    print(f"❌ Error processing API response: {str(e)}")
-                    print("Raw response content:", content if 'content' in locals() else "No content")
-                    return json.dumps({
-                        "overall_sentiment": "Unknown",
-                        "sentiment_score": 0,
-                        "momentum_signals": [],
-                        "reversal_signals": [],
-                        "volume_analysis": "Analysis failed",
-                        "strength_indicators": [],
-                        "weakness_indicators": [],
-                        "market_psychology": "Analysis failed"
-                    })
-            else:
-                print(f"❌ API request failed: {response.text}")
-                return json.dumps({
-                    "overall_sentiment": "Unknown",
-                    "sentiment_score": 0,
-                    "momentum_signals": [],
-                    "reversal_signals": [],
-                    "volume_analysis": "Analysis failed",
-                    "strength_indicators": [],
-                    "weakness_indicators": [],
-                    "market_psychology": "Analysis failed"
-                })
-        except Exception as e:
-            print(f"❌ Error in sentiment analysis: {str(e)}")
-            return json.dumps({
-                "overall_sentiment": "Unknown",
-                "sentiment_score": 0,
-                "momentum_signals": [],
-                "reversal_signals": [],
-                "volume_analysis": "Analysis failed",
-                "strength_indicators": [],
-                "weakness_indicators": [],
-                "market_psychology": "Analysis failed"
-            })
-
-    def _get_market_context(self, df):
-        """Analyze broader market context and potential scenarios"""
-        print("\nMaking API call for market context analysis...")
-        
-        # Calculate market context metrics
-        volatility_trend = df['Volatility'].diff().rolling(window=5).mean().iloc[-1]
-        avg_volume = df['Volume'].rolling(window=20).mean().iloc[-1]
-        current_volume = df['Volume'].iloc[-1]
-        volume_ratio = current_volume / avg_volume
-        
-        prompt = f"""Analyze the following market context and provide detailed insights:
-
-Market Context:
-- Current Volatility: {df['Volatility'].iloc[-1]:.4f} (Trend: {volatility_trend:.4f})
-- Volume Ratio: {volume_ratio:.2f}x average
-- ATR: {df['ATR'].iloc[-1]:.2f}
-- RSI: {df['RSI'].iloc[-1]:.2f}
-- MACD: {df['MACD_12_26_9'].iloc[-1]:.2f}
-- MACD Signal: {df['MACDs_12_26_9'].iloc[-1]:.2f}
-
-Return ONLY a valid JSON object in this exact format:
-{{
-    "market_phase": "string",
-    "dominant_traders": "string",
-    "key_levels": {{
-        "immediate_support": number,
-        "immediate_resistance": number,
-        "major_support": number,
-        "major_resistance": number
-    }},
-    "volume_profile": "string",
-    "volatility_state": "string",
-    "potential_scenarios": [
-        {{
-            "scenario": "string",
-            "probability": number,
-            "key_triggers": ["string"]
-        }}
-    ],
-    "risk_reward_ratio": number,
-    "recommended_position_size": "string"
-}}"""
-
-        try:
-            print("Sending request to OpenRouter API...")
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=self.headers,
-                json={
-                    "model": "deepseek/deepseek-r1-distill-llama-70b",
-                    "messages": [
-                        {"role": "system", "content": "You are a market context analysis AI. For market_phase use one of: ['Accumulation', 'Mark Up', 'Distribution', 'Mark Down', 'Re-accumulation']. For dominant_traders use one of: ['Institutional', 'Retail', 'Mixed']. Probabilities should sum to 100."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 350
-                }
-            )
-            
-            print(f"API Response Status: {response.status_code}")
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-                    print("Full API Response:", result)
-                    
-                    if 'choices' in result and len(result['choices']) > 0:
-                        content = result['choices'][0]['message']['content'].strip()
-                        print("Raw Content:", content)
-                        
-                        if content.startswith("```json"):
-                            content = content.replace("```json", "").replace("```", "").strip()
-                        elif content.startswith("```"):
-                            content = content.replace("```", "").strip()
-                        
-                        json_content = json.loads(content)
-                        required_fields = ['market_phase', 'dominant_traders', 'key_levels', 'volume_profile', 
-                                        'volatility_state', 'potential_scenarios', 'risk_reward_ratio', 
-                                        'recommended_position_size']
-                        if all(field in json_content for field in required_fields):
-                            print("✅ Market context analysis received and validated")
-                            print(f"Market Phase: {json_content['market_phase']} (R/R: {json_content['risk_reward_ratio']})")
-                            return json.dumps(json_content)
-                        else:
-                            raise ValueError("Missing required fields in JSON response")
-                    else:
-                        raise ValueError("No choices in API response")
-                except Exception as e:
-                    print(f"❌ Error processing API response: {str(e)}")
-                    print("Raw response content:", content if 'content' in locals() else "No content")
-                    return json.dumps({
-                        "market_phase": "Unknown",
-                        "dominant_traders": "Unknown",
-                        "key_levels": {
-                            "immediate_support": df['Close'].iloc[-1] * 0.95,
-                            "immediate_resistance": df['Close'].iloc[-1] * 1.05,
-                            "major_support": df['Close'].iloc[-1] * 0.90,
-                            "major_resistance": df['Close'].iloc[-1] * 1.10
-                        },
-                        "volume_profile": "Analysis failed",
-                        "volatility_state": "Unknown",
-                        "potential_scenarios": [],
-                        "risk_reward_ratio": 0,
-                        "recommended_position_size": "Analysis failed"
-                    })
-            else:
-                print(f"❌ API request failed: {response.text}")
-                return json.dumps({
-                    "market_phase": "Unknown",
-                    "dominant_traders": "Unknown",
-                    "key_levels": {
-                        "immediate_support": df['Close'].iloc[-1] * 0.95,
-                        "immediate_resistance": df['Close'].iloc[-1] * 1.05,
-                        "major_support": df['Close'].iloc[-1] * 0.90,
-                        "major_resistance": df['Close'].iloc[-1] * 1.10
-                    },
-                    "volume_profile": "Analysis failed",
-                    "volatility_state": "Unknown",
-                    "potential_scenarios": [],
-                    "risk_reward_ratio": 0,
-                    "recommended_position_size": "Analysis failed"
-                })
-        except Exception as e:
-            print(f"❌ Error in market context analysis: {str(e)}")
-            return json.dumps({
-                "market_phase": "Unknown",
-                "dominant_traders": "Unknown",
-                "key_levels": {
-                    "immediate_support": df['Close'].iloc[-1] * 0.95,
-                    "immediate_resistance": df['Close'].iloc[-1] * 1.05,
-                    "major_support": df['Close'].iloc[-1] * 0.90,
-                    "major_resistance": df['Close'].iloc[-1] * 1.10
-                },
-                "volume_profile": "Analysis failed",
-                "volatility_state": "Unknown",
-                "potential_scenarios": [],
-                "risk_reward_ratio": 0,
-                "recommended_position_size": "Analysis failed"
-            })
+    def _get_data(self, symbol, timeframe, period):
+        """Fetch price data and add the technical indicators"""
+        df = self.fetch_data(symbol, timeframe, period)
+        if df is None or df.empty:
+            return None
+        return self.add_technical_indicators(df)
 
     def analyze(self, symbol, timeframe='1d', period='3mo'):
         """Perform comprehensive market analysis using AI"""
-        print(f"\n=== Fetching Data for {symbol} ===")
-        print(f"Timeframe: {timeframe}, Period: {period}")
+        return self._run(self.analyze_async(symbol, timeframe, period))
+
+    async def analyze_async(self, symbol, timeframe='1d', period='3mo'):
+        """Perform comprehensive market analysis with the five AI analyses answered by one request per model"""
+        logger.info("=== Fetching Data for %s ===", symbol)
+        logger.debug("Timeframe: %s, Period: %s", timeframe, period)
         
         try:
-            # Fetch and prepare data
-            df = self._get_data(symbol, timeframe, period)
+            # Fetch and prepare data off the event loop; yfinance blocks
+            loop = asyncio.get_running_loop()
+            df = await loop.run_in_executor(None, self._get_data, symbol, timeframe, period)
             if df is None or len(df) < 20:  # Need at least 20 periods for indicators
                 raise ValueError("Insufficient data for analysis")
             
-            print("\n=== Starting Analysis ===")
-            print(f"Analyzing last {min(30, len(df))} periods")
+            logger.info("=== Starting Analysis ===")
+            logger.debug("Analyzing last %s periods", min(30, len(df)))
             
-            # 1. Pattern Analysis
-            print("\n1. Technical Pattern Analysis...")
-            pattern_analysis = json.loads(self._get_pattern_analysis(df))
-            
-            # 2. Market Regime
-            print("\n2. Market Regime Analysis...")
-            regime_analysis = json.loads(self._get_market_regime(df))
-            
-            # 3. Price Prediction
-            print("\n3. Price Prediction Analysis...")
-            price_prediction = json.loads(self._get_price_prediction(df))
-            
-            # 4. Sentiment Analysis
-            print("\n4. Market Sentiment Analysis...")
-            sentiment_analysis = json.loads(self._get_sentiment_analysis(df))
+            # The fast and strong model each answer their share of the five analyses, concurrently
+            logger.debug("Getting combined pattern, regime, prediction, sentiment and context analysis...")
+            sections = await self._get_combined_analysis(df, ANALYZE_SECTIONS)
+            # Missing sections are empty dicts, so the fields below fall back to their defaults
+            pattern_analysis, regime_analysis, price_prediction, sentiment_analysis, market_context = (
+                sections[section] or {} for section in ANALYZE_SECTIONS
+            )
             
-            # 5. Market Context
-            print("\n5. Market Context Analysis...")
-            market_context = json.loads(self._get_market_context(df))
+            logger.debug("Preparing comprehensive analysis...")
             
-            print("\nPreparing comprehensive analysis...")
+            last = df.iloc[-1].to_dict()
             
             # Combine all analyses into a single response
             analysis = {
                 "symbol": symbol,
                 "timestamp": datetime.now().isoformat(),
-                "current_price": df['Close'].iloc[-1],
+                "current_price": last['Close'],
                 "technical_patterns": {
                     "detected_patterns": pattern_analysis.get("patterns", []),
                     "quality_score": pattern_analysis.get("quality_score", 0),
@@ -923,13 +954,13 @@ Return ONLY a valid JSON object in this exact format:
                     "characteristics": regime_analysis.get("characteristics", [])
                 },
                 "price_prediction": {
-                    "target": price_prediction.get("price_target", df['Close'].iloc[-1]),
+                    "target": price_prediction.get("price_target", last['Close']),
                     "timeframe": price_prediction.get("timeframe", "Unknown"),
                     "confidence": price_prediction.get("confidence", 0),
                     "key_factors": price_prediction.get("key_factors", []),
                     "risk_factors": price_prediction.get("risk_factors", []),
-                    "support_level": price_prediction.get("support_level", df['Close'].iloc[-1] * 0.95),
-                    "resistance_level": price_prediction.get("resistance_level", df['Close'].iloc[-1] * 1.05)
+                    "support_level": price_prediction.get("support_level", last['Close'] * 0.95),
+                    "resistance_level": price_prediction.get("resistance_level", last['Close'] * 1.05)
                 },
                 "sentiment": {
                     "overall": sentiment_analysis.get("overall_sentiment", "Unknown"),
@@ -947,25 +978,25 @@ Return ONLY a valid JSON object in this exact format:
                     "risk_reward_ratio": market_context.get("risk_reward_ratio", 0),
                     "position_sizing": market_context.get("recommended_position_size", "Unknown"),
                     "key_levels": market_context.get("key_levels", {
-                        "immediate_support": df['Close'].iloc[-1] * 0.95,
-                        "immediate_resistance": df['Close'].iloc[-1] * 1.05,
-                        "major_support": df['Close'].iloc[-1] * 0.90,
-                        "major_resistance": df['Close'].iloc[-1] * 1.10
+                        "immediate_support": last['Close'] * 0.95,
+                        "immediate_resistance": last['Close'] * 1.05,
+                        "major_support": last['Close'] * 0.90,
+                        "major_resistance": last['Close'] * 1.10
                     }),
                     "scenarios": market_context.get("potential_scenarios", [])
                 },
                 "technical_indicators": {
-                    "rsi": df['RSI'].iloc[-1],
-                    "macd": df['MACD_12_26_9'].iloc[-1],
-                    "macd_signal": df['MACDs_12_26_9'].iloc[-1],
-                    "volatility": df['Volatility'].iloc[-1],
-                    "atr": df['ATR'].iloc[-1]
+                    "rsi": last['RSI'],
+                    "macd": last['MACD_12_26_9'],
+                    "macd_signal": last['MACDs_12_26_9'],
+                    "volatility": last['Volatility'],
+                    "atr": last['ATR']
                 }
             }
             
-            print("✅ Analysis complete")
+            logger.info("✅ Analysis complete")
             return analysis, df
             
         except Exception as e:
-            print(f"❌ Error in analysis: {str(e)}")
+            logger.error("❌ Error in analysis: %s", e)
             return None, None 
\ No newline at end of file
@@ -1,17 +1,169 @@
 import os
-import json
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import aiohttp
 from datetime import datetime
 from dotenv import load_dotenv
-import pandas as pd
 import numpy as np
-from data_collector import DataCollector
+from data_collector import DataCollector, RequestQueue
+from disk_cache import DiskCache, CACHE_DIR
 import asyncio
+import time
+import threading
+import hashlib
+from collections import OrderedDict, Counter
+import re
+import math
 import streamlit as st
 
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; sentiment_stats falls back to NumPy reductions
+    njit = None
+
+# Read the .env file once at import
+load_dotenv()
+
+# Model used for every sentiment and summary request
+SENTIMENT_MODEL = "deepseek/deepseek-r1:nitro"
+
+# Sentiment results are cached in-process (LRU), on disk across runs and, when REDIS_URL is set, in Redis;
+# every tier expires them SENTIMENT_CACHE_TTL seconds after they were scored
+SENTIMENT_CACHE_SIZE = 4096
+SENTIMENT_CACHE_TTL = 3600
+SENTIMENT_DB_PATH = os.path.join(CACHE_DIR, 'sentiment.sqlite')
+
+# Maximum number of tweet analyses in flight at once
+SENTIMENT_CONCURRENCY = 10
+
+# Async HTTP timeouts (seconds); no total limit because summaries stream for minutes,
+# but a stalled connection or a silent socket is abandoned
+OPENROUTER_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=10, sock_read=300)
+
+# Tweets scored together in one chat completion, so the instructions are sent once per group
+SENTIMENT_GROUP_SIZE = 10
+
+# The JSON array in a grouped response, which may be wrapped in prose or code fences
+JSON_ARRAY_RE = re.compile(r'\[.*\]', re.S)
+
+# A labelled score such as "Score: 0.6", "Sentiment score is: -0.3" or "**Rating:** 0.8"
+SCORE_RE = re.compile(r'(?:score|sentiment|rating)(?:\s+is)?\s*\**\s*[:=]\s*\**\s*([-+]?\d*\.?\d+)', re.I)
+# The same score once its line has ended, so a streamed number can't still be growing
+COMPLETE_SCORE_RE = re.compile(SCORE_RE.pattern + r'\**[ \t]*\n', re.I)
+
+# Fallback polarity keywords, used when a response has no explicit score
+POLARITY_KEYWORDS = {
+    'positive': ['bullish', 'positive', 'optimistic', 'growth', 'gain'],
+    'negative': ['bearish', 'negative', 'pessimistic', 'decline', 'loss']
+}
+
+# Common crypto sentiment-related keywords
+THEME_KEYWORDS = {
+    'bullish': ['bullish', 'uptrend', 'growth', 'rally', 'surge'],
+    'bearish': ['bearish', 'downtrend', 'decline', 'dump', 'crash'],
+    'momentum': ['momentum', 'volume', 'breakout', 'resistance', 'support'],
+    'fundamental': ['adoption', 'development', 'partnership', 'news', 'update'],
+    'risk': ['risk', 'volatile', 'uncertainty', 'caution', 'warning']
+}
+
+def _keyword_scanner(groups):
+    """Compile keyword groups into one alternation regex and a keyword -> group lookup"""
+    lookup = {keyword: group for group, keywords in groups.items() for keyword in keywords}
+    # Longest first so a keyword never shadows a longer one it prefixes
+    pattern = '|'.join(re.escape(keyword) for keyword in sorted(lookup, key=len, reverse=True))
+    return re.compile(pattern), lookup
+
+# Each analysis is scanned once for all keywords instead of once per keyword
+POLARITY_RE, POLARITY_LOOKUP = _keyword_scanner(POLARITY_KEYWORDS)
+THEME_RE, THEME_LOOKUP = _keyword_scanner(THEME_KEYWORDS)
+
+# OpenRouter requests started per minute, shared by every async call of an analyzer
+OPENROUTER_RATE_LIMIT = int(os.getenv('OPENROUTER_RATE_LIMIT', 60))
+
+# Statuses worth retrying: rate limits and transient server errors
+OPENROUTER_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class OpenRouterQueue(RequestQueue):
+    """Request queue for OpenRouter calls: fewer retries, but also retries 5xx errors"""
+    BACKOFF_BASE = 1
+    MAX_RETRIES = 3
+    RETRY_STATUSES = OPENROUTER_RETRY_STATUSES
+
+@st.cache_resource
+def get_redis_client():
+    """Connect to Redis once per process, or return None when it is not configured"""
+    redis_url = os.getenv('REDIS_URL')
+    if not redis_url:
+        return None
+    
+    try:
+        import redis
+        client = redis.Redis.from_url(redis_url)
+        client.ping()
+        print("✅ Connected to Redis sentiment cache")
+        return client
+    except Exception as e:
+        print(f"⚠️ Redis cache unavailable, using in-process cache only: {str(e)}")
+        return None
+
+def _fused_sentiment_stats(scores, engagement):
+    """Weighted mean, mean, sample std, min and max of the scores in one pass"""
+    n = scores.shape[0]
+    mean = 0.0
+    m2 = 0.0
+    lo = scores[0]
+    hi = scores[0]
+    weighted_sum = 0.0
+    weight_sum = 0.0
+    for i in range(n):
+        x = scores[i]
+        w = engagement[i]
+        weighted_sum += x * w
+        weight_sum += w
+        # Welford's update keeps the variance accurate without a second pass
+        delta = x - mean
+        mean += delta / (i + 1)
+        m2 += delta * (x - mean)
+        if x < lo:
+            lo = x
+        if x > hi:
+            hi = x
+    weighted = weighted_sum / weight_sum if weight_sum > 0 else mean
+    std = math.sqrt(m2 / (n - 1)) if n > 1 else math.nan
+    return weighted, mean, std, lo, hi, weight_sum
+
+if njit is not None:
+    _fused_sentiment_stats = njit(cache=True)(_fused_sentiment_stats)
+
+def sentiment_stats(scores, engagement):
+    """
+    Summarize float64 score and engagement arrays as
+    (weighted mean, mean, sample std, min, max, total engagement).
+    Scores are weighted by engagement, or equally when there is none.
+    """
+    if njit is not None:
+        return _fused_sentiment_stats(scores, engagement)
+    
+    engagement_total = engagement.sum()
+    mean = scores.mean()
+    weighted = scores @ engagement / engagement_total if engagement_total > 0 else mean
+    std = scores.std(ddof=1) if scores.size > 1 else math.nan
+    return weighted, mean, std, scores.min(), scores.max(), engagement_total
+
+@st.cache_resource
+def get_disk_cache():
+    """Open the on-disk sentiment cache once per process, or return None if it can't be opened"""
+    try:
+        return DiskCache(SENTIMENT_DB_PATH, ttl=SENTIMENT_CACHE_TTL)
+    except Exception as e:
+        print(f"⚠️ Disk sentiment cache unavailable: {str(e)}")
+        return None
+
 class SentimentAnalyzer:
     def __init__(self):
-        load_dotenv()
         self.api_key = os.getenv('OPENROUTER_API_KEY')
         
         if not self.api_key:
@@ -24,22 +176,325 @@ class SentimentAnalyzer:
             'X-Title': 'Crypto Sentiment Analyzer'
         }
         
+        # Keep-alive sessions so repeated API calls reuse their connections
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # Retry rate limits and server errors on the blocking session, honouring Retry-After.
+        # Its only POST is the chat completion, which is safe to send again
+        retry = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=OPENROUTER_RETRY_STATUSES,
+            allowed_methods=None,
+            respect_retry_after_header=True
+        )
+        # One pooled connection per concurrent caller, e.g. several single-text analyses at once
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=SENTIMENT_CONCURRENCY,
+            max_retries=retry
+        ))
+        # The Batch API gets its own session that only retries the status and result GETs:
+        # resending a file upload or batch creation the server already accepted would create
+        # and bill a duplicate job
+        self.batch_session = requests.Session()
+        self.batch_session.headers.update(self.headers)
+        self.batch_session.mount('https://', HTTPAdapter(
+            max_retries=Retry(
+                total=3,
+                backoff_factor=1,
+                status_forcelist=OPENROUTER_RETRY_STATUSES,
+                respect_retry_after_header=True
+            )
+        ))
+        self.aio_session = None
+        # Throttles and retries the async calls; also bounds how many are in flight
+        self.request_queue = OpenRouterQueue(
+            concurrency=SENTIMENT_CONCURRENCY,
+            rate=OPENROUTER_RATE_LIMIT,
+            period=60,
+            delay_range=None
+        )
+        
+        # Sentiment cache keyed on a hash of the model and normalized text, holding (expires_at,
+        # result) pairs. Every session and the batch executor threads share this analyzer, so the
+        # LRU is only touched under its lock
+        self.sentiment_cache = OrderedDict()
+        self._sentiment_cache_lock = threading.Lock()
+        self.disk_cache = get_disk_cache()
+        self.redis = get_redis_client()
+        
         # Initialize data collector
         self.data_collector = DataCollector()
         self.twitter_initialized = False
+        self._init_lock = None
+        
+        # OpenAI-compatible Batch API used for cheap, non-interactive runs
+        self.batch_api_url = os.getenv('OPENROUTER_BATCH_URL', 'https://openrouter.ai/api/v1')
         
     async def init(self):
-        """Initialize the data collector"""
-        if not self.twitter_initialized:
-            await self.data_collector.init()
-            self.twitter_initialized = True
+        """Initialize the data collector once; later calls return immediately"""
+        if self.twitter_initialized:
+            return
+            
+        # Concurrent callers wait for the first login instead of starting their own
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        async with self._init_lock:
+            if not self.twitter_initialized:
+                await self.data_collector.init()
+                self.twitter_initialized = True
             
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Close the HTTP sessions and the data collector's browser"""
+        if self.aio_session is not None and not self.aio_session.closed:
+            await self.aio_session.close()
+        self.session.close()
+        self.batch_session.close()
+        await self.data_collector.close()
+
     def analyze_text(self, text):
         """
         Analyze the sentiment of a given text using DeepSeek's step-by-step reasoning.
         Returns a detailed sentiment analysis with explanation.
         """
-        prompt = f"""Analyze the sentiment of this crypto-related text. Follow these steps:
+        cache_key = self._sentiment_cache_key(text)
+        cached = self._get_cached_sentiment(cache_key)
+        if cached is not None:
+            cached['text'] = text
+            return cached
+            
+        try:
+            response = self.session.post(
+                "https://openrouter.ai/api/v1/chat/completions",
+                data=orjson.dumps({
+                    "model": SENTIMENT_MODEL,
+                    "messages": [{"role": "user", "content": self._sentiment_prompt(text)}],
+                    "stream": True
+                }),
+                stream=True
+            )
+            
+            with response:
+                if response.status_code != 200:
+                    print(f"API request failed with status code: {response.status_code}")
+                    print("Response text:", response.text)
+                    raise Exception(f"API request failed with status code: {response.status_code}")
+                    
+                tokens = []
+                for raw_line in response.iter_lines():
+                    done, token = self._sse_token(raw_line)
+                    if done:
+                        break
+                    if token:
+                        tokens.append(token)
+                        # Closing the response once the score line is in drops the trailing tokens
+                        if '\n' in token and COMPLETE_SCORE_RE.search(''.join(tokens)):
+                            break
+                            
+            analysis = self._build_sentiment_result(text, ''.join(tokens))
+            self._set_cached_sentiment(cache_key, analysis)
+            return analysis
+                
+        except Exception as e:
+            print(f"Error in analyze_text: {str(e)}")
+            raise e
+
+    async def analyze_text_async(self, text):
+        """Async version of analyze_text that shares one aiohttp session across calls"""
+        cache_key = self._sentiment_cache_key(text)
+        cached = self._get_cached_sentiment(cache_key)
+        if cached is not None:
+            cached['text'] = text
+            return cached
+            
+        content = await self._stream_completion(self._sentiment_prompt(text), stop_at_score=True)
+        analysis = self._build_sentiment_result(text, content)
+        self._set_cached_sentiment(cache_key, analysis)
+        return analysis
+
+    async def analyze_texts_async(self, texts, on_analyzed=None):
+        """
+        Analyze many texts, scoring SENTIMENT_GROUP_SIZE of them per request.
+        Returns one result per text in input order, or the exception for texts that failed.
+        on_analyzed is called as each text finishes with (texts finished so far, index, result).
+        """
+        results = [None] * len(texts)
+        completed = 0
+        
+        def finish(index, result):
+            nonlocal completed
+            results[index] = result
+            completed += 1
+            if on_analyzed:
+                on_analyzed(completed, index, result)
+        
+        pending = []
+        for index, text in enumerate(texts):
+            cached = self._get_cached_sentiment(self._sentiment_cache_key(text))
+            if cached is not None:
+                cached['text'] = text
+                finish(index, cached)
+            else:
+                pending.append(index)
+        
+        async def analyze_group(indices):
+            group = [texts[index] for index in indices]
+            try:
+                analyses = await self._analyze_group(group)
+            except Exception as e:
+                print(f"⚠️ Grouped analysis failed, analyzing tweets one by one: {str(e)}")
+                analyses = {}
+                
+            for position, index in enumerate(indices):
+                analysis = analyses.get(position)
+                if analysis is not None:
+                    self._set_cached_sentiment(self._sentiment_cache_key(texts[index]), analysis)
+                    finish(index, analysis)
+                    continue
+                # Texts the model skipped or answered unparseably fall back to a single request
+                try:
+                    finish(index, await self.analyze_text_async(texts[index]))
+                except Exception as e:
+                    finish(index, e)
+        
+        await asyncio.gather(*(
+            analyze_group(pending[start:start + SENTIMENT_GROUP_SIZE])
+            for start in range(0, len(pending), SENTIMENT_GROUP_SIZE)
+        ))
+        return results
+
+    async def _analyze_group(self, texts):
+        """Score several texts in one request; returns {position: result} for the texts the model answered"""
+        numbered = '\n'.join(f"{i}) {' '.join(text.split())}" for i, text in enumerate(texts, 1))
+        prompt = f"""Analyze the sentiment of each of these numbered crypto-related texts.
+        For each one identify the key sentiment indicators and likely market impact,
+        then give a sentiment score from -1 (very negative) to 1 (very positive).
+        
+        Respond with only a JSON array containing one object per text:
+        [{{"id": <text number>, "analysis": "<brief reasoning>", "score": <number>}}]
+        
+        Texts:
+        {numbered}"""
+        
+        content = await self._complete(prompt)
+        match = JSON_ARRAY_RE.search(content)
+        if not match:
+            raise ValueError("Response did not contain a JSON array")
+        
+        analyses = {}
+        for item in orjson.loads(match.group(0)):
+            try:
+                position = int(item['id']) - 1
+                score = float(item['score'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= position < len(texts):
+                analyses[position] = self._build_sentiment_result(texts[position], str(item.get('analysis', '')), score)
+        return analyses
+
+    async def _complete(self, prompt):
+        """Send one chat completion through the request queue and return the response text"""
+        payload = orjson.dumps({
+            "model": SENTIMENT_MODEL,
+            "messages": [{"role": "user", "content": prompt}]
+        })
+        
+        async def post():
+            session = await self._get_aio_session()
+            async with session.post("https://openrouter.ai/api/v1/chat/completions", data=payload) as response:
+                if response.status != 200:
+                    print(f"API request failed with status code: {response.status}")
+                    print("Response text:", await response.text())
+                    response.raise_for_status()
+                return orjson.loads(await response.read())
+        
+        # The queue keeps us under the provider's rate limit and retries 429s and 5xx errors
+        body = await self.request_queue.add(post)
+        return body['choices'][0]['message']['content']
+
+    def _sentiment_cache_key(self, text):
+        """Hash the model and a text into a compact sentiment cache key"""
+        # Case and whitespace differences don't change the sentiment, so they share an entry
+        normalized = ' '.join(text.lower().split())
+        return "s:" + hashlib.blake2b(f"{SENTIMENT_MODEL}|{normalized}".encode('utf-8'), digest_size=16).hexdigest()
+
+    def _get_cached_sentiment(self, key):
+        """Look up a sentiment result in memory, then on disk, then in Redis"""
+        now = time.time()
+        with self._sentiment_cache_lock:
+            entry = self.sentiment_cache.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if now < expires_at:
+                    self.sentiment_cache.move_to_end(key)
+                    return dict(result)
+                del self.sentiment_cache[key]
+        
+        # Hits from the slower tiers are kept in memory only for the time they have left there
+        if self.disk_cache is not None:
+            try:
+                entry = self.disk_cache.get_entry(key)
+                if entry is not None:
+                    result, stored_at = entry
+                    self._remember_sentiment(key, result, stored_at + SENTIMENT_CACHE_TTL)
+                    return dict(result)
+            except Exception as e:
+                print(f"⚠️ Disk cache read failed: {str(e)}")
+        
+        if self.redis is not None:
+            try:
+                value, ttl_ms = self.redis.pipeline().get(key).pttl(key).execute()
+                if value:
+                    result = orjson.loads(value)
+                    expires_at = now + ttl_ms / 1000 if ttl_ms > 0 else now + SENTIMENT_CACHE_TTL
+                    self._remember_sentiment(key, result, expires_at)
+                    return dict(result)
+            except Exception as e:
+                print(f"⚠️ Redis cache read failed: {str(e)}")
+        
+        return None
+
+    def _set_cached_sentiment(self, key, result):
+        """Store a sentiment result in memory, on disk and in Redis with a TTL"""
+        self._remember_sentiment(key, result)
+        
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.set(key, result)
+            except Exception as e:
+                print(f"⚠️ Disk cache write failed: {str(e)}")
+        
+        if self.redis is not None:
+            try:
+                self.redis.setex(key, SENTIMENT_CACHE_TTL, orjson.dumps(result))
+            except Exception as e:
+                print(f"⚠️ Redis cache write failed: {str(e)}")
+
+    def _remember_sentiment(self, key, result, expires_at=None):
+        """
+        Add a result to the in-process LRU until expires_at (default SENTIMENT_CACHE_TTL from now),
+        evicting the oldest entry when full
+        """
+        if expires_at is None:
+            expires_at = time.time() + SENTIMENT_CACHE_TTL
+        # Copy so callers can annotate their result without touching the cache
+        result = dict(result)
+        with self._sentiment_cache_lock:
+            self.sentiment_cache[key] = (expires_at, result)
+            self.sentiment_cache.move_to_end(key)
+            if len(self.sentiment_cache) > SENTIMENT_CACHE_SIZE:
+                self.sentiment_cache.popitem(last=False)
+
+    def _sentiment_prompt(self, text):
+        """Build the step-by-step sentiment prompt for a text"""
+        return f"""Analyze the sentiment of this crypto-related text. Follow these steps:
         1. Identify key sentiment indicators
         2. Consider market impact and technical factors
         3. Evaluate overall sentiment
@@ -49,55 +504,119 @@ class SentimentAnalyzer:
         
         Provide your analysis in clear steps and end with a numerical score."""
 
-        try:
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=self.headers,
-                json={
-                    "model": "deepseek/deepseek-r1:nitro",
-                    "messages": [{"role": "user", "content": prompt}]
+    def _build_sentiment_result(self, text, analysis, score=None):
+        """Turn a model response into a sentiment result, parsing the score from it unless given"""
+        if score is None:
+            # The last labelled score in the response wins, as the model ends with its verdict
+            matches = SCORE_RE.findall(analysis)
+            # Fallback to sentiment keywords
+            score = float(matches[-1]) if matches else self._extract_sentiment_score(analysis)
+        
+        return {
+            'text': text,
+            'analysis': analysis,
+            'sentiment_score': score,
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def analyze_batch(self, texts, poll_interval=10):
+        """
+        Analyze many texts with a single Batch API job instead of serial requests.
+        Costs roughly half as much, but results can take up to 24 hours.
+        """
+        return [result for result in self._analyze_batch_aligned(texts, poll_interval) if result is not None]
+
+    def _analyze_batch_aligned(self, texts, poll_interval=10):
+        """Run texts through the Batch API, returning one result per text (None where the item failed)"""
+        results = [None] * len(texts)
+        pending = []
+        for index, text in enumerate(texts):
+            cached = self._get_cached_sentiment(self._sentiment_cache_key(text))
+            if cached is not None:
+                cached['text'] = text
+                results[index] = cached
+            else:
+                pending.append(index)
+        if not pending:
+            return results
+            
+        # File uploads are multipart, so drop the session's JSON content type there
+        upload_headers = {'Content-Type': None}
+        lines = [
+            orjson.dumps({
+                'custom_id': f't{i}',
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': {
+                    'model': SENTIMENT_MODEL,
+                    'messages': [{'role': 'user', 'content': self._sentiment_prompt(texts[i])}]
                 }
+            })
+            for i in pending
+        ]
+        
+        try:
+            upload = self.batch_session.post(
+                f"{self.batch_api_url}/files",
+                headers=upload_headers,
+                data={'purpose': 'batch'},
+                files={'file': ('sentiment_batch.jsonl', b'\n'.join(lines))}
             )
+            upload.raise_for_status()
+            
+            response = self.batch_session.post(
+                f"{self.batch_api_url}/batches",
+                data=orjson.dumps({
+                    'input_file_id': orjson.loads(upload.content)['id'],
+                    'endpoint': '/v1/chat/completions',
+                    'completion_window': '24h'
+                })
+            )
+            response.raise_for_status()
+            batch = orjson.loads(response.content)
+            print(f"📦 Submitted batch {batch['id']} with {len(pending)} texts")
+            
+            while batch['status'] not in ('completed', 'failed', 'expired', 'cancelled'):
+                time.sleep(poll_interval)
+                response = self.batch_session.get(f"{self.batch_api_url}/batches/{batch['id']}")
+                response.raise_for_status()
+                batch = orjson.loads(response.content)
+            
+            if batch['status'] != 'completed':
+                raise Exception(f"Batch {batch['id']} ended with status: {batch['status']}")
+            
+            output = self.batch_session.get(f"{self.batch_api_url}/files/{batch['output_file_id']}/content")
+            output.raise_for_status()
+            
+            # Map each custom_id back to the model's answer
+            contents = {}
+            for line in output.content.splitlines():
+                if not line.strip():
+                    continue
+                item = orjson.loads(line)
+                body = (item.get('response') or {}).get('body')
+                if not body or 'choices' not in body:
+                    print(f"⚠️ Batch item {item.get('custom_id')} failed: {item.get('error')}")
+                    continue
+                contents[item['custom_id']] = body['choices'][0]['message']['content']
+            
+            for i in pending:
+                if f't{i}' in contents:
+                    results[i] = self._build_sentiment_result(texts[i], contents[f't{i}'])
+                    self._set_cached_sentiment(self._sentiment_cache_key(texts[i]), results[i])
+            return results
             
-            if response.status_code == 200:
-                result = response.json()['choices'][0]['message']
-                analysis = result['content']
-                
-                # Extract sentiment score using simple heuristics
-                try:
-                    # Look for numerical score in the response
-                    score = float([line for line in analysis.split('\n') 
-                                if any(x in line.lower() for x in ['score:', 'score is:', 'sentiment:', 'rating:'])][-1]
-                                .split(':')[-1].strip().split()[0])
-                except:
-                    # Fallback to sentiment keywords
-                    score = self._extract_sentiment_score(analysis)
-                
-                return {
-                    'text': text,
-                    'analysis': analysis,
-                    'sentiment_score': score,
-                    'timestamp': datetime.now().isoformat()
-                }
-            else:
-                print(f"API request failed with status code: {response.status_code}")
-                print("Response text:", response.text)
-                raise Exception(f"API request failed with status code: {response.status_code}")
-                
         except Exception as e:
-            print(f"Error in analyze_text: {str(e)}")
+            print(f"Error in analyze_batch: {str(e)}")
             raise e
 
     def _extract_sentiment_score(self, analysis):
         """
         Extract sentiment score from analysis text using keyword matching.
         """
-        positive_words = ['bullish', 'positive', 'optimistic', 'growth', 'gain']
-        negative_words = ['bearish', 'negative', 'pessimistic', 'decline', 'loss']
-        
-        analysis_lower = analysis.lower()
-        positive_count = sum(analysis_lower.count(word) for word in positive_words)
-        negative_count = sum(analysis_lower.count(word) for word in negative_words)
+        counts = Counter(POLARITY_LOOKUP[match] for match in POLARITY_RE.findall(analysis.lower()))
+        positive_count = counts['positive']
+        negative_count = counts['negative']
         
         total = positive_count + negative_count
         if total == 0:
@@ -105,28 +624,33 @@ class SentimentAnalyzer:
         
         return (positive_count - negative_count) / total
 
-    def analyze_multiple_sources(self, texts):
+    def analyze_multiple_sources(self, texts, use_batch=False):
         """
         Analyze sentiment from multiple text sources and aggregate results.
+        With use_batch the texts are submitted as one Batch API job.
         """
-        results = []
-        for text in texts:
-            try:
-                result = self.analyze_text(text)
-                results.append(result)
-            except Exception as e:
-                print(f"Error analyzing text: {str(e)}")
-                continue
+        if use_batch:
+            results = self.analyze_batch(texts)
+        else:
+            results = []
+            for text in texts:
+                try:
+                    result = self.analyze_text(text)
+                    results.append(result)
+                except Exception as e:
+                    print(f"Error analyzing text: {str(e)}")
+                    continue
         
         if not results:
             return None
         
-        df = pd.DataFrame(results)
+        scores = np.fromiter((r['sentiment_score'] for r in results), dtype=np.float64, count=len(results))
         
         return {
             'individual_results': results,
-            'average_sentiment': df['sentiment_score'].mean(),
-            'sentiment_std': df['sentiment_score'].std(),
+            'average_sentiment': float(scores.mean()),
+            # Sample standard deviation, undefined for a single text
+            'sentiment_std': float(scores.std(ddof=1)) if scores.size > 1 else float('nan'),
             'timestamp': datetime.now().isoformat()
         }
 
@@ -137,7 +661,14 @@ class SentimentAnalyzer:
         if len(sentiment_scores) != len(price_changes):
             raise ValueError("Length of sentiment scores and price changes must match")
         
-        correlation = np.corrcoef(sentiment_scores, price_changes)[0, 1]
+        # Pearson r from centred dot products; corrcoef would build the full 2x2 matrix
+        x = np.asarray(sentiment_scores, dtype=np.float64)
+        y = np.asarray(price_changes, dtype=np.float64)
+        x = x - x.mean()
+        y = y - y.mean()
+        denominator = np.sqrt((x @ x) * (y @ y))
+        # Undefined when either series is constant, as with corrcoef
+        correlation = float(x @ y / denominator) if denominator > 0 else float('nan')
         return {
             'correlation': correlation,
             'interpretation': self._interpret_correlation(correlation),
@@ -159,7 +690,75 @@ class SentimentAnalyzer:
         else:
             return "Strong negative correlation: Sentiment strongly inversely predicts price movements"
 
-    async def analyze_crypto_ticker(self, ticker, hours_back=24, max_tweets=50, progress_callback=None):
+    async def _get_aio_session(self):
+        """Return the shared async HTTP session, creating it on first use"""
+        # Created lazily so the session binds to the event loop that actually runs it
+        if self.aio_session is None or self.aio_session.closed:
+            # One connection per queue slot plus headroom for the summary stream
+            connector = aiohttp.TCPConnector(
+                limit=SENTIMENT_CONCURRENCY + 2,
+                limit_per_host=SENTIMENT_CONCURRENCY + 2,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+                enable_cleanup_closed=True
+            )
+            self.aio_session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=OPENROUTER_TIMEOUT
+            )
+        return self.aio_session
+
+    @staticmethod
+    def _sse_token(raw_line):
+        """Parse one line of a streamed completion into (done, token)"""
+        line = raw_line.decode('utf-8').strip()
+        # Skip keep-alive comments and blank separators
+        if not line.startswith('data:'):
+            return False, None
+        payload = line[len('data:'):].strip()
+        if payload == '[DONE]':
+            return True, None
+        
+        choices = orjson.loads(payload).get('choices') or [{}]
+        return False, choices[0].get('delta', {}).get('content')
+
+    async def _stream_completion(self, prompt, on_token=None, stop_at_score=False):
+        """
+        Stream a chat completion over SSE, awaiting on_token for each new token.
+        With stop_at_score the stream is abandoned as soon as a complete score line has arrived.
+        """
+        tokens = []
+        body = orjson.dumps({
+            "model": SENTIMENT_MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": True
+        })
+        
+        async def open_stream():
+            session = await self._get_aio_session()
+            response = await session.post("https://openrouter.ai/api/v1/chat/completions", data=body)
+            # Releases the connection and raises for a failed status
+            response.raise_for_status()
+            return response
+        
+        # Only opening the stream is retried, so tokens are never sent to on_token twice
+        response = await self.request_queue.add(open_stream)
+        async with response:
+            async for raw_line in response.content:
+                done, token = self._sse_token(raw_line)
+                if done:
+                    break
+                if token:
+                    tokens.append(token)
+                    if on_token:
+                        await on_token(token)
+                    if stop_at_score and '\n' in token and COMPLETE_SCORE_RE.search(''.join(tokens)):
+                        break
+        
+        return ''.join(tokens)
+
+    async def analyze_crypto_ticker(self, ticker, hours_back=24, max_tweets=50, progress_callback=None, on_token=None, use_batch_api=False, on_stats=None):
         """
         Optimized analysis of a crypto ticker using Twitter data.
         
@@ -168,6 +767,9 @@ class SentimentAnalyzer:
             hours_back (int): Number of hours of historical data to analyze
             max_tweets (int): Maximum number of tweets to analyze (10-100)
             progress_callback (callable): Function to call with progress updates
+            on_token (callable): Async function awaited with each streamed summary token
+            use_batch_api (bool): Score tweets with one Batch API job (half the cost, up to 24h)
+            on_stats (callable): Called with (weighted_sentiment, stats) before the summary is requested
         """
         if not self.twitter_initialized:
             raise RuntimeError("Twitter functionality not initialized. Call init() first.")
@@ -206,29 +808,60 @@ class SentimentAnalyzer:
             "Processing market indicators"
         ]
         
-        # Analyze tweets
-        for idx, row in enumerate(data.iterrows(), 1):
-            _, row = row
-            try:
-                print(f"\n📝 Analyzing tweet {idx}/{total_tweets}")
-                progress_callback(f"Analyzing tweet {idx}/{total_tweets}")
-                
-                # Show different progress messages during analysis
-                if idx % 3 == 1:  # Show a different message every 3rd tweet
-                    progress_callback(analysis_messages[idx % len(analysis_messages)])
-                
-                analysis = self.analyze_text(row['text'])
-                analysis['source'] = 'twitter'
-                analysis['engagement'] = row.get('engagement', 0)
-                
-                print(f"Sentiment: {analysis['sentiment_score']:.2f}")
-                if analysis['engagement']:
-                    print(f"Engagement: {analysis['engagement']}")
-                
-                analyses.append(analysis)
-            except Exception as e:
-                print(f"⚠️ Error with tweet {idx}: {str(e)}")
+        # Plain Python values, so the per-tweet loop doesn't touch pandas
+        texts = data['text'].tolist()
+        engagements = data['engagement'].tolist() if 'engagement' in data else [0] * total_tweets
+        
+        # Keep a running sentiment as results arrive, so progress shows it before the last tweet is in
+        running = {'count': 0, 'score_sum': 0.0, 'weighted_sum': 0.0, 'weight_sum': 0.0}
+        
+        def on_analyzed(completed, index, result):
+            if not isinstance(result, Exception):
+                engagement = engagements[index] or 0
+                running['count'] += 1
+                running['score_sum'] += result['sentiment_score']
+                running['weighted_sum'] += result['sentiment_score'] * engagement
+                running['weight_sum'] += engagement
+            
+            if running['count'] and completed % 3 == 0:
+                if running['weight_sum'] > 0:
+                    current = running['weighted_sum'] / running['weight_sum']
+                else:
+                    current = running['score_sum'] / running['count']
+                progress_callback(f"Analyzed tweet {completed}/{total_tweets} (sentiment so far: {current:.2f})")
+            else:
+                progress_callback(f"Analyzed tweet {completed}/{total_tweets}")
+            # Show different progress messages during analysis
+            if completed % 3 == 1:  # Show a different message every 3rd tweet
+                progress_callback(analysis_messages[completed % len(analysis_messages)])
+        
+        # Score tweets in groups per request, with the groups running concurrently
+        if use_batch_api:
+            progress_callback("Submitted tweets as a batch job - results can take a while")
+            # The batch job polls with blocking requests, so keep it off the event loop
+            batch_results = await asyncio.get_running_loop().run_in_executor(
+                None, self._analyze_batch_aligned, texts
+            )
+            results = [
+                result if result is not None else Exception("No result in batch output")
+                for result in batch_results
+            ]
+        else:
+            results = await self.analyze_texts_async(texts, on_analyzed)
+        
+        for idx, (analysis, engagement) in enumerate(zip(results, engagements), 1):
+            if isinstance(analysis, Exception):
+                print(f"⚠️ Error with tweet {idx}: {str(analysis)}")
                 continue
+                
+            analysis['source'] = 'twitter'
+            analysis['engagement'] = engagement
+            
+            print(f"\n📝 Tweet {idx}/{total_tweets} sentiment: {analysis['sentiment_score']:.2f}")
+            if analysis['engagement']:
+                print(f"Engagement: {analysis['engagement']}")
+            
+            analyses.append(analysis)
 
         if not analyses:
             print("❌ Could not analyze any tweets")
@@ -242,20 +875,30 @@ class SentimentAnalyzer:
 
         # Calculate weighted sentiment score
         print("\n📊 Calculating overall sentiment...")
-        df = pd.DataFrame(analyses)
+        scores = np.fromiter((a['sentiment_score'] for a in analyses), dtype=np.float64, count=len(analyses))
+        engagement = np.fromiter((a['engagement'] for a in analyses), dtype=np.float64, count=len(analyses))
         
-        # Handle engagement weights
-        if df['engagement'].sum() > 0:
-            df['weight'] = df['engagement'] / df['engagement'].max()  # Normalize engagement scores
-            print("Using engagement-weighted sentiment")
-        else:
-            # If no engagement, use equal weights
-            df['weight'] = 1.0
-            print("Using equally-weighted sentiment")
-            
-        weighted_sentiment = (df['sentiment_score'] * df['weight']).sum() / df['weight'].sum()
+        # Engagement-weighted when there is engagement, otherwise equally weighted
+        weighted_sentiment, mean, std, lowest, highest, engagement_total = sentiment_stats(scores, engagement)
+        print("Using engagement-weighted sentiment" if engagement_total > 0 else "Using equally-weighted sentiment")
+        
+        weighted_sentiment = float(weighted_sentiment)
+        stats = {
+            'tweet_count': len(analyses),
+            'sentiment_mean': float(mean),
+            # Sample standard deviation, undefined for a single tweet
+            'sentiment_std': float(std),
+            'sentiment_range': {
+                'min': float(lowest),
+                'max': float(highest)
+            },
+            'avg_engagement': float(engagement_total / engagement.size)
+        }
         print(f"📈 Overall sentiment score: {weighted_sentiment:.2f}")
         progress_callback(f"Calculating final sentiment analysis (Score: {weighted_sentiment:.2f})")
+        # The numbers are final now, so they can be shown while the summary is generated
+        if on_stats:
+            on_stats(weighted_sentiment, stats)
 
         # Generate summary using DeepSeek
         print("\n🤖 Generating comprehensive analysis...")
@@ -297,25 +940,15 @@ class SentimentAnalyzer:
         Context:
         - Weighted sentiment score: {weighted_sentiment:.2f}
         - Number of sources analyzed: {len(analyses)}
-        - Sentiment range: {df['sentiment_score'].min():.2f} to {df['sentiment_score'].max():.2f}
-        - Common themes: {', '.join(self._extract_common_themes(df['analysis'].tolist()))}"""
+        - Sentiment range: {stats['sentiment_range']['min']:.2f} to {stats['sentiment_range']['max']:.2f}
+        - Common themes: {', '.join(self._extract_common_themes([a['analysis'] for a in analyses]))}"""
 
         print("Making final API request...")
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=self.headers,
-            json={
-                "model": "deepseek/deepseek-r1:nitro",
-                "messages": [{"role": "user", "content": summary_prompt}]
-            }
-        )
-
-        if response.status_code == 200:
-            result = response.json()['choices'][0]['message']
-            analysis_text = result['content']
+        try:
+            analysis_text = await self._stream_completion(summary_prompt, on_token)
             print("✅ Analysis complete!")
-        else:
-            print(f"⚠️ Error generating final analysis: {response.status_code}")
+        except Exception as e:
+            print(f"⚠️ Error generating final analysis: {str(e)}")
             analysis_text = "Failed to generate analysis"
 
         print("\n🎉 All done!")
@@ -324,41 +957,19 @@ class SentimentAnalyzer:
             'weighted_sentiment': weighted_sentiment,
             'individual_analyses': analyses,
             'analysis_content': analysis_text,
-            'stats': {
-                'tweet_count': len(analyses),
-                'sentiment_mean': df['sentiment_score'].mean(),
-                'sentiment_std': df['sentiment_score'].std(),
-                'sentiment_range': {
-                    'min': df['sentiment_score'].min(),
-                    'max': df['sentiment_score'].max()
-                },
-                'avg_engagement': df['engagement'].mean()
-            },
+            'stats': stats,
             'timestamp': datetime.now().isoformat()
         }
 
     def _extract_common_themes(self, analyses, min_occurrences=2):
         """Extract common themes from sentiment analyses"""
-        # Common crypto sentiment-related keywords
-        themes = {
-            'bullish': ['bullish', 'uptrend', 'growth', 'rally', 'surge'],
-            'bearish': ['bearish', 'downtrend', 'decline', 'dump', 'crash'],
-            'momentum': ['momentum', 'volume', 'breakout', 'resistance', 'support'],
-            'fundamental': ['adoption', 'development', 'partnership', 'news', 'update'],
-            'risk': ['risk', 'volatile', 'uncertainty', 'caution', 'warning']
-        }
-        
-        # Count occurrences of each theme
-        theme_counts = {theme: 0 for theme in themes}
-        
+        # Count the analyses that mention each theme at least once
+        theme_counts = Counter()
         for analysis in analyses:
-            analysis_lower = analysis.lower()
-            for theme, keywords in themes.items():
-                if any(keyword in analysis_lower for keyword in keywords):
-                    theme_counts[theme] += 1
+            theme_counts.update({THEME_LOOKUP[match] for match in THEME_RE.findall(analysis.lower())})
         
         # Return themes that appear multiple times
-        common_themes = [theme for theme, count in theme_counts.items() 
-                        if count >= min_occurrences]
+        common_themes = [theme for theme in THEME_KEYWORDS
+                        if theme_counts[theme] >= min_occurrences]
         
         return common_themes if common_themes else ['neutral'] 
\ No newline at end of file
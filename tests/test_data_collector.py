@@ -0,0 +1,150 @@
+import unittest
+import asyncio
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pandas as pd
+import aiohttp
+from data_collector import RequestQueue, simhash, dedupe_near_duplicates, parse_counts
+
+class FastRequestQueue(RequestQueue):
+    """RequestQueue without the politeness delays so tests run instantly"""
+    BACKOFF_BASE = 0
+    BACKOFF_CAP = 0
+
+    async def _random_delay(self):
+        pass
+
+class TestRequestQueue(unittest.TestCase):
+    def test_backoff_is_capped(self):
+        """Test that the backoff delay depends on attempts and never exceeds the cap"""
+        queue = RequestQueue()
+        self.assertLessEqual(queue._backoff_delay(0), queue.BACKOFF_BASE * 1.5)
+        self.assertLessEqual(queue._backoff_delay(50), queue.BACKOFF_CAP * 1.5)
+    
+    def test_backoff_honours_retry_after(self):
+        """Test that a Retry-After header sets the delay, still within the cap"""
+        queue = RequestQueue()
+        error = aiohttp.ClientResponseError(None, (), status=429, headers={'Retry-After': '7'})
+        self.assertEqual(queue._backoff_delay(0, error), 7)
+        error = aiohttp.ClientResponseError(None, (), status=429, headers={'Retry-After': '3600'})
+        self.assertEqual(queue._backoff_delay(0, error), queue.BACKOFF_CAP)
+    
+    def test_retries_until_success(self):
+        """Test that a failing request is retried and its result returned"""
+        queue = FastRequestQueue()
+        calls = []
+        
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise aiohttp.ClientConnectionError("temporary failure")
+            return "ok"
+        
+        async def run():
+            return await queue.add(flaky)
+        
+        self.assertEqual(asyncio.run(run()), "ok")
+        self.assertEqual(len(calls), 3)
+    
+    def test_does_not_retry_other_errors(self):
+        """Test that errors other than rate limits and network failures are raised at once"""
+        queue = FastRequestQueue()
+        calls = []
+        
+        async def broken():
+            calls.append(1)
+            raise ValueError("bad response")
+        
+        async def run():
+            return await queue.add(broken)
+        
+        with self.assertRaises(ValueError):
+            asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+    
+    def test_limits_concurrency(self):
+        """Test that no more than `concurrency` requests run at once"""
+        queue = FastRequestQueue(concurrency=2)
+        running = []
+        peak = []
+        
+        async def slow():
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+            return True
+        
+        async def run():
+            return await asyncio.gather(*[queue.add(slow) for _ in range(6)])
+        
+        self.assertEqual(asyncio.run(run()), [True] * 6)
+        self.assertEqual(max(peak), 2)
+    
+    def test_rate_limit_spaces_requests(self):
+        """Test that requests beyond `rate` per `period` wait for the window to pass"""
+        queue = FastRequestQueue(concurrency=4, rate=2, period=0.1)
+        
+        async def now():
+            return asyncio.get_running_loop().time()
+        
+        async def run():
+            return await asyncio.gather(*[queue.add(now) for _ in range(3)])
+        
+        started = asyncio.run(run())
+        self.assertGreaterEqual(max(started) - min(started), 0.09)
+    
+    def test_gives_up_after_max_retries(self):
+        """Test that the last error is raised once retries are exhausted"""
+        queue = FastRequestQueue()
+        calls = []
+        
+        async def failing():
+            calls.append(1)
+            raise aiohttp.ClientConnectionError("permanent failure")
+        
+        async def run():
+            return await queue.add(failing)
+        
+        with self.assertRaises(aiohttp.ClientConnectionError):
+            asyncio.run(run())
+        self.assertEqual(len(calls), queue.MAX_RETRIES + 1)
+
+class TestNearDuplicates(unittest.TestCase):
+    def test_simhash_ignores_case_and_punctuation(self):
+        """Test that formatting-only differences give the same fingerprint"""
+        text = "Huge $BTC pump incoming, buy now before it moons #bitcoin"
+        self.assertEqual(simhash(text), simhash(text.upper() + "!!!"))
+    
+    def test_dedupe_keeps_most_engaged_and_sums_engagement(self):
+        """Test that copies collapse into the top tweet with combined engagement"""
+        text = "Huge $BTC pump incoming, buy now before it moons #bitcoin"
+        df = pd.DataFrame({
+            'text': [text, text.upper(), "ETH looks weak here, expecting a pullback to support"],
+            'engagement': [5, 10, 1]
+        })
+        
+        deduped = dedupe_near_duplicates(df)
+        
+        self.assertEqual(len(deduped), 2)
+        self.assertEqual(deduped.iloc[0]['text'], text.upper())
+        self.assertEqual(deduped.iloc[0]['engagement'], 15)
+
+class TestParseCounts(unittest.TestCase):
+    def test_abbreviated_counts(self):
+        """Test that K/M/B suffixes and separators are expanded"""
+        counts = parse_counts(pd.Series(["42", "1,024", "1.2K", "3.4m", "2B"]))
+        self.assertEqual(counts.tolist(), [42, 1024, 1200, 3400000, 2000000000])
+    
+    def test_missing_count(self):
+        """Test that empty, missing or non-numeric text counts as zero"""
+        counts = parse_counts(pd.Series(["", None, "Like", "1.2.3"]))
+        self.assertEqual(counts.tolist(), [0, 0, 0, 0])
+
+def run_tests():
+    """Run the test suite"""
+    unittest.main(argv=[''], verbosity=2, exit=False)
+
+if __name__ == '__main__':
+    run_tests()
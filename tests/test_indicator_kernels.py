@@ -0,0 +1,124 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+from ta.trend import MACD
+from ta.volatility import BollingerBands, AverageTrueRange
+from indicator_kernels import (
+    fill_ohlcv_kernel, rsi_kernel, macd_kernel, bbands_kernel, atr_kernel, returns_volatility_kernel, lttb_kernel,
+    make_rsi, make_macd, make_bbands, make_atr, make_returns_volatility
+)
+
+class TestIndicatorKernels(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Build a random walk of OHLC prices"""
+        rng = np.random.default_rng(7)
+        close = 100 + np.cumsum(rng.normal(0, 2, 300))
+        cls.close = pd.Series(close)
+        cls.high = pd.Series(close + np.abs(rng.normal(0, 1, 300)))
+        cls.low = pd.Series(close - np.abs(rng.normal(0, 1, 300)))
+    
+    def assertMatches(self, actual, expected):
+        np.testing.assert_allclose(actual, np.asarray(expected, dtype=np.float64), rtol=1e-9, atol=1e-9)
+    
+    def test_rsi_matches_ta(self):
+        """Test that the RSI kernel matches ta's RSIIndicator"""
+        expected = RSIIndicator(close=self.close, window=14).rsi()
+        self.assertMatches(rsi_kernel(self.close.to_numpy(), 14), expected)
+    
+    def test_rsi_without_losses_is_100(self):
+        """Test that a series that only rises has an RSI of 100"""
+        rsi = rsi_kernel(np.arange(1.0, 31.0), 14)
+        self.assertTrue(np.isnan(rsi[:13]).all())
+        self.assertTrue((rsi[13:] == 100).all())
+    
+    def test_macd_matches_ta(self):
+        """Test that the MACD kernel matches ta's MACD line, signal and histogram"""
+        macd = MACD(close=self.close, window_slow=26, window_fast=12, window_sign=9)
+        line, signal, hist = macd_kernel(self.close.to_numpy(), 12, 26, 9)
+        self.assertMatches(line, macd.macd())
+        self.assertMatches(signal, macd.macd_signal())
+        self.assertMatches(hist, macd.macd_diff())
+    
+    def test_bbands_match_ta(self):
+        """Test that the Bollinger Bands kernel matches ta's BollingerBands"""
+        bb = BollingerBands(close=self.close, window=20, window_dev=2)
+        upper, middle, lower = bbands_kernel(self.close.to_numpy(), 20, 2.0)
+        self.assertMatches(upper, bb.bollinger_hband())
+        self.assertMatches(middle, bb.bollinger_mavg())
+        self.assertMatches(lower, bb.bollinger_lband())
+    
+    def test_atr_matches_ta(self):
+        """Test that the ATR kernel matches ta's AverageTrueRange"""
+        expected = AverageTrueRange(high=self.high, low=self.low, close=self.close, window=14).average_true_range()
+        actual = atr_kernel(self.high.to_numpy(), self.low.to_numpy(), self.close.to_numpy(), 14)
+        self.assertMatches(actual, expected)
+    
+    def test_atr_short_series_is_zero(self):
+        """Test that a series shorter than the window gives zeros instead of failing"""
+        atr = atr_kernel(np.ones(5), np.ones(5), np.ones(5), 14)
+        self.assertTrue((atr == 0).all())
+
+    def test_returns_volatility_match_pandas(self):
+        """Test that returns and rolling volatility match pct_change and rolling std"""
+        returns, volatility = returns_volatility_kernel(self.close.to_numpy(), 5)
+        expected = self.close.pct_change()
+        self.assertMatches(returns, expected)
+        self.assertMatches(volatility, expected.rolling(5).std())
+
+    def test_fill_ohlcv_matches_pandas(self):
+        """Test that the OHLCV gap fill matches the ffill/fillna chain it replaced"""
+        nan = np.nan
+        df = pd.DataFrame({
+            'Open': [nan, 1.0, nan, 4.0, nan],
+            'High': [nan, 2.0, nan, nan, 6.0],
+            'Low': [nan, 0.5, 1.5, nan, nan],
+            'Close': [nan, 1.5, nan, 4.5, nan],
+            'Volume': [10.0, nan, 30.0, nan, 50.0]
+        })
+        expected = df.copy()
+        expected['Close'] = expected['Close'].ffill()
+        for column in ['High', 'Low', 'Open']:
+            expected[column] = expected[column].fillna(expected['Close'])
+        expected['Volume'] = expected['Volume'].fillna(0)
+        
+        filled = fill_ohlcv_kernel(df.to_numpy(dtype=np.float64))
+        np.testing.assert_array_equal(filled, expected.to_numpy())
+
+    def test_lttb_keeps_endpoints_and_spikes(self):
+        """Test that LTTB returns n_out ordered rows including the ends and an isolated spike"""
+        y = np.zeros(1000)
+        y[537] = 10.0
+        rows = lttb_kernel(y, 20)
+        self.assertEqual(len(rows), 20)
+        self.assertTrue((np.diff(rows) > 0).all())
+        self.assertEqual((rows[0], rows[-1]), (0, 999))
+        self.assertIn(537, rows)
+        np.testing.assert_array_equal(lttb_kernel(y[:10], 20), np.arange(10))
+
+    def test_specialized_kernels_match_generic(self):
+        """Test that the fixed-window kernels give exactly the generic kernels' output"""
+        close, high, low = self.close.to_numpy(), self.high.to_numpy(), self.low.to_numpy()
+        pairs = [
+            ((rsi_kernel(close, 14),), (make_rsi(14)(close),)),
+            (macd_kernel(close, 12, 26, 9), make_macd(12, 26, 9)(close)),
+            (bbands_kernel(close, 20, 2.0), make_bbands(20, 2.0)(close)),
+            ((atr_kernel(high, low, close, 14),), (make_atr(14)(high, low, close),)),
+            (returns_volatility_kernel(close, 5), make_returns_volatility(5)(close))
+        ]
+        for generic, specialized in pairs:
+            for expected, actual in zip(generic, specialized):
+                np.testing.assert_array_equal(actual, expected)
+        self.assertIs(make_rsi(14), make_rsi(14))
+
+def run_tests():
+    """Run the test suite"""
+    unittest.main(argv=[''], verbosity=2, exit=False)
+
+if __name__ == '__main__':
+    run_tests()
@@ -5,7 +5,8 @@ from datetime import datetime, timedelta
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
-from pattern_detector import PatternDetector
+import time
+from pattern_detector import PatternDetector, JsonObjectScanner, CircuitBreaker, SECTION_VALIDATORS
 
 class TestPatternDetector(unittest.TestCase):
     @classmethod
@@ -169,6 +170,66 @@ class TestPatternDetector(unittest.TestCase):
         result = self.detector._parse_analysis(text_analysis)
         self.assertIsInstance(result, dict)
         self.assertTrue(len(result['patterns']) > 0)
+    
+    def test_json_object_scanner(self):
+        """Test that streamed JSON is recognized as complete at its closing brace, ignoring braces in strings"""
+        scanner = JsonObjectScanner()
+        self.assertIsNone(scanner.feed('```json\n{"note": "a } and \\" {",'))
+        self.assertIsNone(scanner.feed(' "levels": {"support": 95}'))
+        self.assertEqual(scanner.feed('}\n```'), 1)
+    
+    def test_circuit_breaker(self):
+        """Test that the breaker opens after repeated failures and lets calls through after its cooldown"""
+        breaker = CircuitBreaker(fail_max=2, reset_timeout=0.05)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertFalse(breaker.is_open())
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open())
+        time.sleep(0.06)
+        self.assertFalse(breaker.is_open())
+        # A failed trial call reopens it straight away
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open())
+    
+    def test_section_validators(self):
+        """Test that answers need their required fields, with the types their schema shows"""
+        validate = SECTION_VALIDATORS['price_prediction']
+        answer = {
+            "price_target": 110.5, "confidence": 70, "timeframe": "Short-term (1-3 days)",
+            "key_factors": ["RSI"], "risk_factors": [], "support_level": 95, "resistance_level": 115
+        }
+        self.assertTrue(validate(answer))
+        self.assertFalse(validate({**answer, "key_factors": "RSI"}))
+        self.assertFalse(validate({**answer, "price_target": "N/A"}))
+        self.assertFalse(validate({key: value for key, value in answer.items() if key != "timeframe"}))
+        self.assertFalse(validate([answer]))
+        self.assertFalse(validate({**answer, "confidence": True}))
+        self.assertFalse(validate({**answer, "key_factors": ["RSI", 3]}))
+
+    def test_section_validators_nested(self):
+        """Test that list elements and nested objects are checked against their schema example"""
+        levels = SECTION_VALIDATORS['support_resistance']
+        level = {"price": 95, "strength": 7, "volume_confirmation": "High"}
+        self.assertTrue(levels({"support_levels": [level], "resistance_levels": []}))
+        self.assertFalse(levels({"support_levels": [95, 100], "resistance_levels": ['x']}))
+        self.assertFalse(levels({"support_levels": [{**level, "price": "95"}], "resistance_levels": []}))
+        self.assertFalse(levels({"support_levels": [{"price": 95}], "resistance_levels": []}))
+
+        context = SECTION_VALIDATORS['market_context']
+        answer = {
+            "market_phase": "Mark Up", "dominant_traders": "Mixed",
+            "key_levels": {"immediate_support": 95, "immediate_resistance": 105, "major_support": 90, "major_resistance": 110},
+            "volume_profile": "Rising", "volatility_state": "Low",
+            "potential_scenarios": [{"scenario": "Breakout", "probability": 60, "key_triggers": ["Volume"]}],
+            "risk_reward_ratio": 2.5, "recommended_position_size": "Small"
+        }
+        self.assertTrue(context(answer))
+        self.assertFalse(context({**answer, "potential_scenarios": [1]}))
+        self.assertFalse(context({**answer, "risk_reward_ratio": True}))
+        self.assertFalse(context({**answer, "key_levels": {**answer["key_levels"], "major_support": None}}))
+        self.assertFalse(context({**answer, "potential_scenarios": [{**answer["potential_scenarios"][0], "key_triggers": [1]}]}))
 
 def run_tests():
     """Run the test suite"""